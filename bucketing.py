@@ -3,25 +3,24 @@ Bucketing system for information set abstraction in MCCFR.
 Maps game states to coarse buckets to reduce memory usage.
 '''
 
-from hand_evaluator import evaluate_hand, get_hand_strength_category, RANK_VALUES
+import re
+import sys
+from functools import lru_cache
+from itertools import product
+from math import prod
+from hand_evaluator import (evaluate_hand, drop_one_evaluate, get_hand_strength_category,
+                            RANK_VALUES, CARD_PRIMES, SUITS)
 
 
-def get_preflop_bucket(hole_cards):
+# Rank value and suit index of every card string, so hot paths skip the str index + rank lookup
+_CARD_RANK = {rank + suit: value for rank, value in RANK_VALUES.items() for suit in SUITS}
+_CARD_SUIT = {rank + suit: i for rank in RANK_VALUES for i, suit in enumerate(SUITS)}
+
+
+def _classify_preflop(ranks, is_suited):
     """
-    Bucket for 3-card preflop holdings.
-    
-    Returns:
-        String bucket identifier
+    Bucket for 3 rank values sorted high to low and a suitedness flag.
     """
-    if len(hole_cards) != 3:
-        return "invalid"
-    
-    ranks = sorted([RANK_VALUES[card[0]] for card in hole_cards], reverse=True)
-    suits = [card[1] for card in hole_cards]
-    
-    # Check for suited cards
-    suited_count = max(suits.count(s) for s in set(suits))
-    is_suited = suited_count >= 2
     is_trips = ranks[0] == ranks[1] == ranks[2]
     is_pair = ranks[0] == ranks[1] or ranks[1] == ranks[2]
     
@@ -32,7 +31,6 @@ def get_preflop_bucket(hole_cards):
         bucket = f"trips_{high_rank}"
     elif is_pair:
         pair_rank = ranks[0] if ranks[0] == ranks[1] else ranks[1]
-        kicker = ranks[2] if ranks[0] == ranks[1] else ranks[0]
         # Group pairs into buckets
         if pair_rank >= 10:  # JJ+
             bucket = "high_pair"
@@ -41,9 +39,7 @@ def get_preflop_bucket(hole_cards):
         else:
             bucket = "low_pair"
     else:
-        # No pair - categorize by high card and connectivity
-        gap = ranks[0] - ranks[2]
-        
+        # No pair - categorize by high card
         if high_rank >= 11:  # Queen or better high
             if is_suited:
                 bucket = "high_suited"
@@ -60,6 +56,60 @@ def get_preflop_bucket(hole_cards):
     return bucket
 
 
+# Every ordered rank triple x suitedness, so preflop bucketing is a single lookup
+_PREFLOP_TABLE = {
+    (r0, r1, r2, is_suited): _classify_preflop(sorted((r0, r1, r2), reverse=True), is_suited)
+    for r0, r1, r2 in product(range(len(RANK_VALUES)), repeat=3)
+    for is_suited in (False, True)
+}
+
+
+def get_preflop_bucket(hole_cards):
+    """
+    Bucket for 3-card preflop holdings.
+    
+    Returns:
+        String bucket identifier
+    """
+    if len(hole_cards) != 3:
+        return "invalid"
+    
+    c0, c1, c2 = hole_cards
+    # Suited if at least two cards share a suit
+    is_suited = c0[1] == c1[1] or c0[1] == c2[1] or c1[1] == c2[1]
+    return _PREFLOP_TABLE[_CARD_RANK[c0], _CARD_RANK[c1], _CARD_RANK[c2], is_suited]
+
+
+# Board texture ids pack (base << 2) | (flush_draw << 1) | connected, where
+# base is 0 rainbow, 1 paired, 2 trips; TEXTURE_EMPTY is a board with no cards
+TEXTURE_EMPTY = 12
+TEXTURE_NAMES = tuple(
+    base + ("_flush" if flush_draw else "") + ("_connected" if connected else "")
+    for base in ("rainbow", "paired", "trips")
+    for flush_draw in (False, True)
+    for connected in (False, True)
+) + ("empty",)
+
+# Interned postflop bucket indexed [hand category][texture id], so bucketing
+# never builds a new string
+_POSTFLOP_BUCKETS = tuple(
+    tuple(sys.intern(f"cat{category}_{texture}") for texture in TEXTURE_NAMES)
+    for category in range(9)
+)
+
+
+def _is_connected(rank_mask):
+    """
+    Straight potential of a set of ranks: 3+ distinct ranks with no gap larger than 2.
+    """
+    present = [rank for rank in range(12, -1, -1) if rank_mask >> rank & 1]
+    return len(present) >= 3 and all(present[i] - present[i + 1] <= 2 for i in range(len(present) - 1))
+
+
+# Straight potential for every 13-bit rank-presence mask
+_CONNECTED_TABLE = bytes(_is_connected(rank_mask) for rank_mask in range(1 << 13))
+
+
 def get_board_texture(board_cards):
     """
     Categorize board texture for bucketing.
@@ -67,58 +117,51 @@ def get_board_texture(board_cards):
     Returns:
         String representing board texture
     """
-    if not board_cards:
-        return "empty"
-    
-    ranks = [RANK_VALUES[card[0]] for card in board_cards]
-    suits = [card[1] for card in board_cards]
-    
-    # Check for pairs on board
-    rank_counts = {}
-    for rank in ranks:
-        rank_counts[rank] = rank_counts.get(rank, 0) + 1
-    
-    has_pair = any(count >= 2 for count in rank_counts.values())
-    has_trips = any(count >= 3 for count in rank_counts.values())
-    
-    # Check for flush draw (3+ of same suit)
-    suit_counts = {}
-    for suit in suits:
-        suit_counts[suit] = suit_counts.get(suit, 0) + 1
-    
-    flush_draw = any(count >= 3 for count in suit_counts.values())
-    
-    # Check for straight potential
-    if len(ranks) >= 3:
-        sorted_ranks = sorted(set(ranks), reverse=True)
-        max_gap = 0
-        if len(sorted_ranks) >= 2:
-            for i in range(len(sorted_ranks) - 1):
-                gap = sorted_ranks[i] - sorted_ranks[i + 1]
-                if gap > max_gap:
-                    max_gap = gap
-        
-        connected = max_gap <= 2 if len(sorted_ranks) >= 3 else False
-    else:
-        connected = False
+    return TEXTURE_NAMES[_board_texture_id(tuple(board_cards))]
+
+
+def get_board_texture_batch(boards):
+    """
+    Texture ids for many boards at once, e.g. all chance outcomes sampled at a node.
     
-    # Build texture string
-    texture = []
+    Args:
+        boards: Iterable of board card lists
     
-    if has_trips:
-        texture.append("trips")
-    elif has_pair:
-        texture.append("paired")
+    Returns:
+        List of texture ids; TEXTURE_NAMES[id] gives the texture string
+    """
+    texture_id = _board_texture_id
+    return [texture_id(tuple(board)) for board in boards]
+
+
+@lru_cache(maxsize=100_000)
+def _board_texture_id(board_cards):
+    """Cached texture id of a tuple of cards."""
+    if not board_cards:
+        return TEXTURE_EMPTY
+    
+    # Count ranks and suits and collect the rank-presence mask in one pass
+    rank_counts = [0] * 13
+    suit_counts = [0] * 4
+    rank_mask = 0
+    for card in board_cards:
+        rank = _CARD_RANK[card]
+        rank_counts[rank] += 1
+        rank_mask |= 1 << rank
+        suit_counts[_CARD_SUIT[card]] += 1
+    
+    max_count = max(rank_counts)
+    if max_count >= 3:
+        base = 2
+    elif max_count == 2:
+        base = 1
     else:
-        texture.append("rainbow")
-    
-    if flush_draw:
-        texture.append("flush")
+        base = 0
     
-    if connected:
-        texture.append("connected")
+    # Flush draw: 3+ of same suit
+    flush_draw = max(suit_counts) >= 3
     
-    return "_".join(texture) if texture else "dry"
+    return (base << 2) | (flush_draw << 1) | _CONNECTED_TABLE[rank_mask]
 
 
 def get_postflop_bucket(hole_cards, board_cards, discarded_cards=None):
@@ -134,25 +177,22 @@ def get_postflop_bucket(hole_cards, board_cards, discarded_cards=None):
     Returns:
         String bucket identifier
     """
+    return _postflop_bucket(tuple(hole_cards), tuple(board_cards),
+                            tuple(discarded_cards) if discarded_cards else ())
+
+
+@lru_cache(maxsize=1_000_000)
+def _postflop_bucket(hole_cards, board_cards, discarded_cards):
+    """Cached get_postflop_bucket on tuples of cards."""
     # Combine all available cards for hand evaluation
-    all_cards = hole_cards + board_cards
-    if discarded_cards:
-        all_cards += discarded_cards
+    all_cards = (*hole_cards, *board_cards, *discarded_cards)
     
     if len(all_cards) < 5:
         # Not enough cards for a full evaluation
         return get_preflop_bucket(hole_cards)
     
-    # Get hand strength category
-    hand_category = get_hand_strength_category(all_cards)
-    
-    # Get board texture
-    texture = get_board_texture(board_cards)
-    
-    # Combine into bucket
-    bucket = f"cat{hand_category}_{texture}"
-    
-    return bucket
+    # Combine hand strength category and board texture into bucket
+    return _POSTFLOP_BUCKETS[get_hand_strength_category(all_cards)][_board_texture_id(board_cards)]
 
 
 def get_discard_bucket(hole_cards, board_cards):
@@ -163,22 +203,31 @@ def get_discard_bucket(hole_cards, board_cards):
     Returns:
         String bucket representing the relative strength of the 3 cards
     """
+    return _discard_bucket(tuple(hole_cards), tuple(board_cards))
+
+
+@lru_cache(maxsize=500_000)
+def _discard_bucket(hole_cards, board_cards):
+    """Cached get_discard_bucket on tuples of cards."""
     if len(hole_cards) != 3:
         return "invalid"
     
     # Evaluate strength if we keep each pair of cards
-    strengths = []
-    for discard_idx in range(3):
-        kept_cards = [hole_cards[i] for i in range(3) if i != discard_idx]
-        all_cards = kept_cards + board_cards
-        
-        if len(all_cards) >= 5:
-            strength = evaluate_hand(tuple(all_cards))
+    if len(board_cards) >= 3:
+        # Every kept pair makes a 5+ card hand. Without a possible flush, each
+        # strength comes from the full product with one hole card divided out.
+        hole_primes = [CARD_PRIMES[card] for card in hole_cards]
+        product = prod(hole_primes) * prod(CARD_PRIMES[card] for card in board_cards)
+        all_suits = [card[1] for card in hole_cards + board_cards]
+        if max(all_suits.count(suit) for suit in SUITS) < 5:
+            strengths = [drop_one_evaluate(product, prime) for prime in hole_primes]
         else:
-            # Just use kept cards value as proxy
-            strength = sum(RANK_VALUES[card[0]] for card in kept_cards)
-        
-        strengths.append(strength)
+            strengths = [evaluate_hand(tuple(hole_cards[i] for i in range(3) if i != discard_idx) + board_cards)
+                         for discard_idx in range(3)]
+    else:
+        # Just use kept cards value as proxy
+        strengths = [sum(_CARD_RANK[hole_cards[i]] for i in range(3) if i != discard_idx)
+                     for discard_idx in range(3)]
     
     # Determine which card is weakest
     min_strength = min(strengths)
@@ -205,45 +254,125 @@ def get_infoset_key(player_id, hole_cards, board_cards, discarded_by_us,
         discarded_by_us: Card we discarded (or None)
         discarded_by_opp: Card opponent discarded (or None)  
         street: 0 (preflop), 2 (flop), 3 (post-discard), 4 (turn), 5 (river), 6 (showdown)
-        betting_history: List of action codes for current street
+        betting_history: List of action codes for current street, or a packed
+            history int built with append_history()
         position: True if button, False if out of position
     
     Returns:
-        String representing the information set
+        Integer key packing the street (bits 0-3), position (bit 4), bucket id
+        (bits 5-12) and 4-bit betting history codes (bits 13+).
+        infoset_key_to_str() gives the readable form.
     """
+    discarded = tuple(card for card in (discarded_by_us, discarded_by_opp) if card)
+    if not isinstance(betting_history, int):
+        betting_history = tuple(betting_history) if betting_history else ()
+    return _infoset_key(street, bool(position), tuple(hole_cards), tuple(board_cards),
+                        discarded, betting_history)
+
+
+@lru_cache(maxsize=1_000_000)
+def _infoset_key(street, position, hole_cards, board_cards, discarded, betting_history):
+    """Cached get_infoset_key on hashable arguments."""
     # Determine bucketing strategy based on street
     if street == 0:
         # Preflop
         bucket = get_preflop_bucket(hole_cards)
-    elif street in [2, 3]:
-        # Flop or discard round
-        if len(hole_cards) == 3:
-            bucket = get_discard_bucket(hole_cards, board_cards)
-        else:
-            # After discard
-            discarded = [discarded_by_us] if discarded_by_us else []
-            if discarded_by_opp:
-                discarded.append(discarded_by_opp)
-            bucket = get_postflop_bucket(hole_cards, board_cards, discarded)
+    elif street in [2, 3] and len(hole_cards) == 3:
+        # Flop or discard round, before discarding
+        bucket = _discard_bucket(hole_cards, board_cards)
     else:
-        # Turn or river
-        discarded = []
-        if discarded_by_us:
-            discarded.append(discarded_by_us)
-        if discarded_by_opp:
-            discarded.append(discarded_by_opp)
-        bucket = get_postflop_bucket(hole_cards, board_cards, discarded)
+        # After discard, turn or river
+        bucket = _postflop_bucket(hole_cards, board_cards, discarded)
     
-    # Encode betting history as string
-    bet_history_str = "".join(betting_history) if betting_history else "none"
-    
-    # Position indicator
-    pos_str = "btn" if position else "oop"
+    # Pack street, position, bucket and betting history into one integer
+    if isinstance(betting_history, int):
+        history = betting_history
+    else:
+        history = 0
+        for i, token in enumerate(betting_history):
+            history |= _HISTORY_CODE[token] << (4 * i)
     
-    # Combine all components
-    infoset = f"s{street}_{pos_str}_{bucket}_{bet_history_str}"
+    return street | (position << 4) | (_BUCKET_ID[bucket] << 5) | (history << HISTORY_SHIFT)
+
+
+
+# Every bucket string the functions above can produce, indexed by bucket id
+BUCKETS = tuple(
+    ["invalid", "close_decision", "clear_discard"]
+    + sorted(set(_PREFLOP_TABLE.values()))
+    + [bucket for row in _POSTFLOP_BUCKETS for bucket in row]
+)
+_BUCKET_ID = {bucket: i for i, bucket in enumerate(BUCKETS)}
+
+# Betting history tokens: abstract action codes from training, plus the
+# letters player.py records at runtime. Codes start at 1 so 0 ends a history.
+_HISTORY_TOKENS = ("0", "1", "2", "3", "4", "5", "6", "7", "8", "F", "C", "R", "D0", "D1", "D2")
+_HISTORY_CODE = {token: i + 1 for i, token in enumerate(_HISTORY_TOKENS)}
+_HISTORY_TOKEN_RE = re.compile(r"D\d|.")
+HISTORY_SHIFT = 13  # bit offset of the packed betting history in infoset keys
+
+
+def append_history(history, token):
+    """
+    Packed betting history with one more token appended. 0 is the empty history.
     
-    return infoset
+    Lets callers track a street's history as one int instead of a token list.
+    """
+    # Codes are never 0, so the next free 4-bit slot follows the highest set bit
+    return history | (_HISTORY_CODE[token] << (4 * ((history.bit_length() + 3) // 4)))
+
+
+def infoset_key_to_str(key):
+    """
+    Readable form of a packed infoset key, e.g. "s4_btn_cat1_paired_12".
+    """
+    history = key >> HISTORY_SHIFT
+    tokens = []
+    while history:
+        tokens.append(_HISTORY_TOKENS[(history & 0xF) - 1])
+        history >>= 4
+    pos_str = "btn" if (key >> 4) & 1 else "oop"
+    return f"s{key & 0xF}_{pos_str}_{BUCKETS[(key >> 5) & 0xFF]}_{''.join(tokens) or 'none'}"
+
+
+def parse_infoset_key(infoset):
+    """
+    Packed key for a readable infoset string, e.g. from a strategy saved with string keys.
+    """
+    parts = infoset.split("_")
+    street = int(parts[0][1:])
+    position = parts[1] == "btn"
+    bucket = "_".join(parts[2:-1])
+    tokens = [] if parts[-1] == "none" else _HISTORY_TOKEN_RE.findall(parts[-1])
+    history = 0
+    for i, token in enumerate(tokens):
+        history |= _HISTORY_CODE[token] << (4 * i)
+    return street | (position << 4) | (_BUCKET_ID[bucket] << 5) | (history << HISTORY_SHIFT)
+
+
+def clear_caches():
+    """
+    Drop all memoized bucketing results, e.g. between training runs to bound memory.
+    """
+    _board_texture_id.cache_clear()
+    _postflop_bucket.cache_clear()
+    _discard_bucket.cache_clear()
+    _infoset_key.cache_clear()
+
+
+# Prefer the compiled kernels from bucketing_c.pyx when setup.py has built them
+try:
+    import bucketing_c
+    bucketing_c.configure(
+        [_PREFLOP_TABLE[r0, r1, r2, is_suited]
+         for r0, r1, r2 in product(range(len(RANK_VALUES)), repeat=3)
+         for is_suited in (False, True)],
+        TEXTURE_EMPTY,
+    )
+    get_preflop_bucket = bucketing_c.preflop_bucket
+    _board_texture_id = lru_cache(maxsize=100_000)(bucketing_c.board_texture_id)
+except ImportError:
+    pass
 
 
 if __name__ == "__main__":
@@ -2,9 +2,10 @@
 6.9630 MIT POKERBOTS GAME ENGINE
 DO NOT REMOVE, RENAME, OR EDIT THIS FILE
 '''
-from collections import namedtuple
+from collections import deque, namedtuple
+from functools import cached_property
 from threading import Thread
-from queue import Queue
+from multiprocessing.pool import ThreadPool
 import time
 import math
 import json
@@ -28,11 +29,35 @@ RaiseAction = namedtuple('RaiseAction', ['amount'])
 
 TerminalState = namedtuple('TerminalState', ['deltas', 'previous_state'])
 
+SOCKET_BUFFER_SIZE = 1 << 20  # bytes, for SO_SNDBUF/SO_RCVBUF on player sockets
+LOG_WRITE_CHUNK = 1024  # game log lines joined per write
 STREET_NAMES = ['Flop', 'Discard 1', 'Discard 2', 'Turn', 'River']
-DECODE = {'F': FoldAction, 'C': CallAction, 'K': CheckAction, 'R': RaiseAction, 'D': DiscardAction}
-CCARDS = lambda cards: ','.join(map(str, cards))
-PCARDS = lambda cards: '[{}]'.format(' '.join(map(str, cards))) ### Changed from PCARDS = lambda cards: '[{}]'.format(' '.join(map(str, cards)))
-PVALUE = lambda name, value: ', {} ({})'.format(name, value)
+# log phrasing and message code for the actions that carry no payload
+ACTION_META = {FoldAction: (' folds', 'F'), CallAction: (' calls', 'C'), CheckAction: (' checks', 'K')}
+# action type of each response code, and the parser that turns a clause into that action
+DECODE = {
+    'F': (FoldAction, lambda clause: FoldAction()),
+    'C': (CallAction, lambda clause: CallAction()),
+    'K': (CheckAction, lambda clause: CheckAction()),
+    'R': (RaiseAction, lambda clause: RaiseAction(int(clause[1:]))),
+    'D': (DiscardAction, lambda clause: DiscardAction(int(clause[1:]))),
+}
+CARD_STRS = {}  # str(card) memo, there are only 52 distinct cards
+
+
+def CSTR(card):
+    '''
+    Returns the common-format string of a card, formatting each card only once per match.
+    '''
+    card_str = CARD_STRS.get(card)
+    if card_str is None:
+        card_str = CARD_STRS[card] = str(card)
+    return card_str
+
+
+CCARDS = lambda cards: ','.join(map(CSTR, cards))
+PCARDS = lambda cards: f"[{' '.join(map(CSTR, cards))}]" ### Changed from PCARDS = lambda cards: '[{}]'.format(' '.join(map(str, cards)))
+PVALUE = lambda name, value: f', {name} ({value})'
 STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
 
 # Socket encoding scheme:
@@ -108,8 +133,12 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
             This method assumes both players have equal stacks when reaching showdown,
             which is enforced by an assertion.
         '''
-        score0 = pkrbot.evaluate(self.board + self.hands[0])
-        score1 = pkrbot.evaluate(self.board + self.hands[1])
+        # reuse one card list for both evaluations, swapping in each player's hole cards
+        board_size = len(self.board)
+        cards = self.board + self.hands[0]
+        score0 = pkrbot.evaluate(cards)
+        cards[board_size:] = self.hands[1]
+        score1 = pkrbot.evaluate(cards)
         assert(self.stacks[0] == self.stacks[1])
         if score0 > score1:
             delta = self.get_delta(0)
@@ -125,6 +154,19 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         '''
         Returns a set which corresponds to the active player's legal moves.
         '''
+        return self._legal_actions
+
+    def raise_bounds(self):
+        '''
+        Returns a tuple of the minimum and maximum legal raises.
+        '''
+        return self._raise_bounds
+
+    @cached_property
+    def _legal_actions(self):
+        '''
+        Computes legal_actions() once per state; the result is stored on the instance.
+        '''
         active = self.button % 2
         continue_cost = self.pips[1-active] - self.pips[active]
         if self.street in (2, 3):
@@ -138,9 +180,10 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         raises_forbidden = (continue_cost == self.stacks[active] or self.stacks[1-active] == 0)
         return {FoldAction, CallAction} if raises_forbidden else {FoldAction, CallAction, RaiseAction}
 
-    def raise_bounds(self):
+    @cached_property
+    def _raise_bounds(self):
         '''
-        Returns a tuple of the minimum and maximum legal raises.
+        Computes raise_bounds() once per state; the result is stored on the instance.
         '''
         active = self.button % 2
         continue_cost = self.pips[1-active] - self.pips[active]
@@ -199,40 +242,71 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
             For CheckAction, advances to next street if both players have acted.
             For RaiseAction, updates pips and stacks based on raise amount.
         '''
+        return _PROCEED[type(action)](self, action)
+
+    def _proceed_discard(self, action):
         active = self.button % 2
-        if isinstance(action, DiscardAction):
-            if len(self.hands[active]) != 0:
-                self.board.append(self.hands[active].pop(action.card))
-            state = RoundState((1 - active) % 2, self.street, self.pips, self.stacks, self.hands, self.deck, self.board, self)
-            return state
-        if isinstance(action, FoldAction):
-            delta = self.get_delta((1 - active) % 2) # if active folds, the other player (1 - active) wins
-            return TerminalState([delta, -delta], self)
-        if isinstance(action, CallAction):
-            if self.button == 0:  # sb calls bb
-                return RoundState(1, 0, [BIG_BLIND] * 2, [STARTING_STACK - BIG_BLIND] * 2, self.hands, self.deck, self.board,self)
-            # both players acted
-            new_pips = list(self.pips)
-            new_stacks = list(self.stacks)
-            contribution = new_pips[1-active] - new_pips[active]
-            new_stacks[active] -= contribution
-            new_pips[active] += contribution
-            state = RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.board, self)
-            return state.proceed_street()
-        if isinstance(action, CheckAction):
-            if (self.street == 0 and self.button > 0) or self.button > 1 or self.street == 2 or self.street == 3:  # both players acted
-                return self.proceed_street()
-            # let opponent act
-            return RoundState(self.button + 1, self.street, self.pips, self.stacks, self.hands, self.deck, self.board, self)
-        # isinstance(action, RaiseAction)
-        new_pips = list(self.pips)
-        new_stacks = list(self.stacks)
-        contribution = action.amount - new_pips[active]
-        new_stacks[active] -= contribution
-        new_pips[active] += contribution
+        if len(self.hands[active]) != 0:
+            self.board.append(self.hands[active].pop(action.card))
+        return RoundState((1 - active) % 2, self.street, self.pips, self.stacks, self.hands, self.deck, self.board, self)
+
+    def _proceed_fold(self, action):
+        active = self.button % 2
+        delta = self.get_delta((1 - active) % 2) # if active folds, the other player (1 - active) wins
+        return TerminalState([delta, -delta], self)
+
+    def _proceed_call(self, action):
+        if self.button == 0:  # sb calls bb
+            return RoundState(1, 0, [BIG_BLIND] * 2, [STARTING_STACK - BIG_BLIND] * 2, self.hands, self.deck, self.board,self)
+        # both players acted, so the active player matches the opponent's pip
+        pip0, pip1 = self.pips
+        stack0, stack1 = self.stacks
+        if self.button % 2 == 0:
+            new_pips = [pip1, pip1]
+            new_stacks = [stack0 - (pip1 - pip0), stack1]
+        else:
+            new_pips = [pip0, pip0]
+            new_stacks = [stack0, stack1 - (pip0 - pip1)]
+        state = RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.board, self)
+        return state.proceed_street()
+
+    def _proceed_check(self, action):
+        if (self.street == 0 and self.button > 0) or self.button > 1 or self.street == 2 or self.street == 3:  # both players acted
+            return self.proceed_street()
+        # let opponent act
+        return RoundState(self.button + 1, self.street, self.pips, self.stacks, self.hands, self.deck, self.board, self)
+
+    def _proceed_raise(self, action):
+        pip0, pip1 = self.pips
+        stack0, stack1 = self.stacks
+        if self.button % 2 == 0:
+            new_pips = [action.amount, pip1]
+            new_stacks = [stack0 - (action.amount - pip0), stack1]
+        else:
+            new_pips = [pip0, action.amount]
+            new_stacks = [stack0, stack1 - (action.amount - pip1)]
         return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.board, self)
 
 
+# proceed() dispatches on the exact action type instead of an isinstance chain
+_PROCEED = {
+    DiscardAction: RoundState._proceed_discard,
+    FoldAction: RoundState._proceed_fold,
+    CallAction: RoundState._proceed_call,
+    CheckAction: RoundState._proceed_check,
+    RaiseAction: RoundState._proceed_raise,
+}
+
+# prefer the compiled RoundState from roundstate.pyx when setup.py has built it,
+# keeping the class above as the fallback
+try:
+    import roundstate
+    roundstate.configure(FoldAction, CallAction, CheckAction, RaiseAction, DiscardAction,
+                         TerminalState, STARTING_STACK, BIG_BLIND)
+    RoundState = roundstate.RoundState
+except ImportError:
+    pass
+
 class Player():
     '''
     Handles subprocess and socket interactions with one player's pokerbot.
@@ -245,8 +319,9 @@ class Player():
         self.bankroll = 0
         self.commands = None
         self.bot_subprocess = None
-        self.socketfile = None
-        self.bytes_queue = Queue()
+        self.sock = None
+        self._rxbuf = bytearray()
+        self.bytes_queue = deque()
 
     def build(self):
         '''
@@ -270,12 +345,12 @@ class Player():
                 proc = subprocess.run(self.commands['build'],
                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                                       cwd=self.path, timeout=BUILD_TIMEOUT, check=False)
-                self.bytes_queue.put(proc.stdout)
+                self.bytes_queue.append(proc.stdout)
             except subprocess.TimeoutExpired as timeout_expired:
                 error_message = 'Timed out waiting for ' + self.name + ' to build'
                 print(error_message)
-                self.bytes_queue.put(timeout_expired.stdout)
-                self.bytes_queue.put(error_message.encode())
+                self.bytes_queue.append(timeout_expired.stdout)
+                self.bytes_queue.append(error_message.encode())
             except (TypeError, ValueError):
                 print(self.name, 'build command misformatted')
             except OSError:
@@ -289,6 +364,8 @@ class Player():
             try:
                 server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 with server_socket:
+                    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+                    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
                     server_socket.bind(('', 0))
                     server_socket.settimeout(CONNECT_TIMEOUT)
                     server_socket.listen()
@@ -302,23 +379,28 @@ class Player():
                         try:
                             for line in out:
                                 if self.path == r"./player_chatbot":
-                                    print(line.strip().decode("utf-8"))
+                                    # pass the raw bytes through, no decode or print lock per line
+                                    sys.stdout.buffer.write(line)
+                                    if line.endswith(b'\n'):
+                                        sys.stdout.buffer.flush()
                                 else:
-                                    queue.put(line)
+                                    queue.append(line)
                         except ValueError:
                             pass
                     # start a separate bot listening thread which dies with the program
                     Thread(target=enqueue_output, args=(proc.stdout, self.bytes_queue), daemon=True).start()
                     # block until we timeout or the player connects
                     client_socket, _ = server_socket.accept()
-                    with client_socket:
-                        if self.path == r"./player_chatbot":
-                            client_socket.settimeout(PLAYER_TIMEOUT)
-                        else:
-                            client_socket.settimeout(CONNECT_TIMEOUT)
-                        sock = client_socket.makefile('rw')
-                        self.socketfile = sock
-                        print(self.name, 'connected successfully')
+                    # disable Nagle so each small query is sent immediately
+                    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+                    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+                    if self.path == r"./player_chatbot":
+                        client_socket.settimeout(PLAYER_TIMEOUT)
+                    else:
+                        client_socket.settimeout(CONNECT_TIMEOUT)
+                    self.sock = client_socket
+                    print(self.name, 'connected successfully')
             except (TypeError, ValueError):
                 print(self.name, 'run command misformatted')
             except OSError:
@@ -330,10 +412,10 @@ class Player():
         '''
         Closes the socket connection and stops the pokerbot.
         '''
-        if self.socketfile is not None:
+        if self.sock is not None:
             try:
-                self.socketfile.write('Q\n')
-                self.socketfile.close()
+                self.sock.sendall(b'Q\n')
+                self.sock.close()
             except socket.timeout:
                 print('Timed out waiting for', self.name, 'to disconnect')
             except OSError:
@@ -344,15 +426,15 @@ class Player():
                     outs, _ = self.bot_subprocess.communicate(timeout=PLAYER_TIMEOUT)
                 else:
                     outs, _ = self.bot_subprocess.communicate(timeout=CONNECT_TIMEOUT)
-                self.bytes_queue.put(outs)
+                self.bytes_queue.append(outs)
             except subprocess.TimeoutExpired:
                 print('Timed out waiting for', self.name, 'to quit')
                 self.bot_subprocess.kill()
                 outs, _ = self.bot_subprocess.communicate()
-                self.bytes_queue.put(outs)
+                self.bytes_queue.append(outs)
         with open(self.name + '.txt', 'wb') as log_file:
             bytes_written = 0
-            for output in self.bytes_queue.queue:
+            for output in list(self.bytes_queue):
                 try:
                     bytes_written += log_file.write(output)
                     if bytes_written >= PLAYER_LOG_SIZE_LIMIT:
@@ -360,6 +442,25 @@ class Player():
                 except TypeError:
                     pass
 
+    def _readline(self):
+        '''
+        Reads one newline-terminated message from the socket, buffering any surplus bytes.
+        '''
+        rxbuf = self._rxbuf
+        end = rxbuf.find(b'\n')
+        while end < 0:
+            chunk = self.sock.recv(4096)
+            if not chunk:  # connection closed, hand back whatever is left
+                line = bytes(rxbuf)
+                rxbuf.clear()
+                return line
+            start = len(rxbuf)
+            rxbuf += chunk
+            end = rxbuf.find(b'\n', start)
+        line = bytes(rxbuf[:end])
+        del rxbuf[:end + 1]
+        return line
+
     def query(self, round_state, player_message, game_log):
         '''
         Requests one action from the pokerbot over the socket connection.
@@ -370,8 +471,9 @@ class Player():
 
         Args:
             round_state (RoundState or TerminalState): The current state of the game.
-            player_message (list): Messages to be sent to the player bot, including game state
-                information like time remaining, player position, and cards.
+            player_message (str): Clauses not yet sent to the player bot, each preceded by a space,
+                including game state information like player position, cards and actions.
+                The game clock clause is prepended here.
             game_log (list): A list to store game events and error messages.
 
         Returns:
@@ -387,42 +489,39 @@ class Player():
             - At the end of a round, only CheckAction is considered legal
         '''
         legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
-        if self.socketfile is not None and self.game_clock > 0.:
+        if self.sock is not None and self.game_clock > 0.:
             clause = ''
             try:
-                player_message[0] = 'T{:.3f}'.format(self.game_clock)
-                message = ' '.join(player_message) + '\n'
-                del player_message[1:]  # do not send redundant action history
+                message = f'T{self.game_clock:.3f}{player_message}\n'
                 start_time = time.perf_counter()
-                self.socketfile.write(message)
-                self.socketfile.flush()
-                clause = self.socketfile.readline().strip()
+                self.sock.sendall(message.encode())
+                clause = self._readline().decode().strip()
                 end_time = time.perf_counter()
                 if ENFORCE_GAME_CLOCK and self.path != r"./player_chatbot":
                     self.game_clock -= end_time - start_time
                 if self.game_clock <= 0.:
                     raise socket.timeout
-                action = DECODE[clause[0]]
-                if action in legal_actions:
-                    if clause[0] == 'R':
-                        amount = int(clause[1:])
+                action_type, decode = DECODE[clause[0]]
+                if action_type in legal_actions:
+                    # Parse the payload only once the action type is known to be legal
+                    action = decode(clause)
+                    if action_type is RaiseAction:
                         min_raise, max_raise = round_state.raise_bounds()
-                        if min_raise <= amount <= max_raise:
-                            return action(amount)
-                    elif clause[0] == 'D':
-                        card = int(clause[1:])
-                        if 0 <= card <= 2:
-                            return action(card)
+                        if min_raise <= action.amount <= max_raise:
+                            return action
+                    elif action_type is DiscardAction:
+                        if 0 <= action.card <= 2:
+                            return action
                         else:
-                            game_log.append(f"{self.name} attempted to discard invalid index {card}")
+                            game_log.append(f"{self.name} attempted to discard invalid index {action.card}")
                             # Invalid index - fall through to default action handling
                         ###### index the player's hand 'D0', 'D1', or 'D2' ######
                     else:
-                        return action()
+                        return action
                 else:
                     # Action is not in legal_actions
                     game_log.append(f"street = {round_state.street}")
-                    game_log.append(self.name + ' attempted illegal ' + action.__name__)
+                    game_log.append(self.name + ' attempted illegal ' + action_type.__name__)
             except socket.timeout:
                 error_message = self.name + ' ran out of time'
                 game_log.append(error_message)
@@ -445,68 +544,66 @@ class Game():
 
     def __init__(self):
         self.log = ['6.9630 MIT Pokerbots - ' + PLAYER_1_NAME + ' vs ' + PLAYER_2_NAME]
-        self.player_messages = [[], []]
-        self.preflop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.flop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.turn_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.ev_preflop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.ev_flop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.ev_turn_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
+        # clauses pending for each player, each preceded by a space; cleared once sent
+        self.player_messages = ['', '']
+        # bet bookkeeping is indexed by player id, which stays fixed while seats rotate
+        self.player_ids = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 1}
+        self.preflop_bets = [0, 0]
+        self.flop_bets = [0, 0]
+        self.turn_bets = [0, 0]
+        self.ev_preflop_bets = [0, 0]
+        self.ev_flop_bets = [0, 0]
+        self.ev_turn_bets = [0, 0]
 
     def log_round_state(self, players, round_state):
         '''
         Incorporates RoundState information into the game log and player messages.
         '''
+        id0 = self.player_ids[players[0].name]
+        id1 = 1 - id0
         if round_state.street == 0:
-            self.preflop_bets = {players[0].name: STARTING_STACK-round_state.stacks[0],
-                                     players[1].name: STARTING_STACK-round_state.stacks[1]}
+            self.preflop_bets[id0] = STARTING_STACK-round_state.stacks[0]
+            self.preflop_bets[id1] = STARTING_STACK-round_state.stacks[1]
         elif round_state.street == 4:
-            self.flop_bets = {players[0].name: STARTING_STACK-round_state.stacks[0]-self.preflop_bets[players[0].name],
-                                players[1].name: STARTING_STACK-round_state.stacks[1]-self.preflop_bets[players[1].name]}
+            self.flop_bets[id0] = STARTING_STACK-round_state.stacks[0]-self.preflop_bets[id0]
+            self.flop_bets[id1] = STARTING_STACK-round_state.stacks[1]-self.preflop_bets[id1]
         else:
-            self.turn_bets = {players[0].name: STARTING_STACK-round_state.stacks[0]-self.flop_bets[players[0].name]-self.preflop_bets[players[0].name],
-                                players[1].name: STARTING_STACK-round_state.stacks[1]-self.flop_bets[players[1].name]-self.preflop_bets[players[1].name]}
-            
+            self.turn_bets[id0] = STARTING_STACK-round_state.stacks[0]-self.flop_bets[id0]-self.preflop_bets[id0]
+            self.turn_bets[id1] = STARTING_STACK-round_state.stacks[1]-self.flop_bets[id1]-self.preflop_bets[id1]
         
         if round_state.street == 0 and round_state.button == 0:
-            self.log.append('{} posts the blind of {}'.format(players[0].name, SMALL_BLIND))
-            self.log.append('{} posts the blind of {}'.format(players[1].name, BIG_BLIND))
-            self.log.append('{} dealt {}'.format(players[0].name, PCARDS(round_state.hands[0])))
-            self.log.append('{} dealt {}'.format(players[1].name, PCARDS(round_state.hands[1])))
-            self.player_messages[0] = ['T0.', 'P0', 'H' + CCARDS(round_state.hands[0]), 'G']
-            self.player_messages[1] = ['T0.', 'P1', 'H' + CCARDS(round_state.hands[1]), 'G']
+            self.log.append(f'{players[0].name} posts the blind of {SMALL_BLIND}')
+            self.log.append(f'{players[1].name} posts the blind of {BIG_BLIND}')
+            self.log.append(f'{players[0].name} dealt {PCARDS(round_state.hands[0])}')
+            self.log.append(f'{players[1].name} dealt {PCARDS(round_state.hands[1])}')
+            self.player_messages[0] = ' P0 H' + CCARDS(round_state.hands[0]) + ' G'
+            self.player_messages[1] = ' P1 H' + CCARDS(round_state.hands[1]) + ' G'
         elif (round_state.street > 0 and round_state.street != 3 and round_state.button == 1) or (round_state.street == 3 and round_state.button == 0):
             board = round_state.board
             self.log.append(STREET_NAMES[round_state.street - 2] + ' ' + PCARDS(board) +
                             PVALUE(players[0].name, STARTING_STACK-round_state.stacks[0]) +
                             PVALUE(players[1].name, STARTING_STACK-round_state.stacks[1]))
             self.log.append(f"Current stacks: {round_state.stacks[0]}, {round_state.stacks[1]}")
-            compressed_board = 'B' + CCARDS(board)
-            self.player_messages[0].append(compressed_board)
-            self.player_messages[1].append(compressed_board)
+            compressed_board = ' B' + CCARDS(board)
+            self.player_messages[0] += compressed_board
+            self.player_messages[1] += compressed_board
 
     def log_action(self, name, action, bet_override, hand):
         '''
         Incorporates action information into the game log and player messages.
         '''
-        if isinstance(action, FoldAction):
-            phrasing = ' folds'
-            code = 'F'
-        elif isinstance(action, CallAction):
-            phrasing = ' calls'
-            code = 'C'
-        elif isinstance(action, CheckAction):
-            phrasing = ' checks'
-            code = 'K'
-        elif isinstance(action, DiscardAction):
-            phrasing = ' discards ' + str(hand[action.card])
-            code = 'D' + str(action.card)
-        else:  # isinstance(action, RaiseAction)
-            phrasing = (' bets ' if bet_override else ' raises to ') + str(action.amount)
-            code = 'R' + str(action.amount)
+        meta = ACTION_META.get(type(action))
+        if meta is not None:
+            phrasing, code = meta
+        elif type(action) is DiscardAction:
+            phrasing = ' discards ' + CSTR(hand[action.card])
+            code = f'D{action.card}'
+        else:  # RaiseAction
+            phrasing = f"{' bets ' if bet_override else ' raises to '}{action.amount}"
+            code = f'R{action.amount}'
         self.log.append(name + phrasing)
-        self.player_messages[0].append(code)
-        self.player_messages[1].append(code)
+        self.player_messages[0] += ' ' + code
+        self.player_messages[1] += ' ' + code
 
     def log_terminal_state(self, players, round_state):
         '''
@@ -514,14 +611,14 @@ class Game():
         '''
         previous_state = round_state.previous_state
         if not self.log[-1].endswith(' folds'):
-            self.log.append('{} shows {}'.format(players[0].name, PCARDS(previous_state.hands[0])))
-            self.log.append('{} shows {}'.format(players[1].name, PCARDS(previous_state.hands[1])))
-            self.player_messages[0].append('O' + CCARDS(previous_state.hands[1]))
-            self.player_messages[1].append('O' + CCARDS(previous_state.hands[0]))
-        self.log.append('{} awarded {}'.format(players[0].name, round_state.deltas[0]))
-        self.log.append('{} awarded {}'.format(players[1].name, round_state.deltas[1]))
-        self.player_messages[0].append('A' + str(round_state.deltas[0]))
-        self.player_messages[1].append('A' + str(round_state.deltas[1]))
+            self.log.append(f'{players[0].name} shows {PCARDS(previous_state.hands[0])}')
+            self.log.append(f'{players[1].name} shows {PCARDS(previous_state.hands[1])}')
+            self.player_messages[0] += ' O' + CCARDS(previous_state.hands[1])
+            self.player_messages[1] += ' O' + CCARDS(previous_state.hands[0])
+        self.log.append(f'{players[0].name} awarded {round_state.deltas[0]}')
+        self.log.append(f'{players[1].name} awarded {round_state.deltas[1]}')
+        self.player_messages[0] += ' A' + str(round_state.deltas[0])
+        self.player_messages[1] += ' A' + str(round_state.deltas[1])
 
     def run_round(self, players):
         '''
@@ -539,17 +636,22 @@ class Game():
             active = round_state.button % 2
             player = players[active]
             action = player.query(round_state, self.player_messages[active], self.log)
+            self.player_messages[active] = ''  # do not send redundant action history
             bet_override = (round_state.pips == [0, 0])
             self.log_action(player.name, action, bet_override, round_state.hands[active])
             round_state = round_state.proceed(action)
         self.log_terminal_state(players, round_state)
-        for i in range(len(players)):
-            multiplier = 1 if round_state.deltas[i] > 0 else (0 if round_state.deltas[i] == 0 else -1)
-            self.ev_preflop_bets[players[i].name] += multiplier * self.preflop_bets[players[i].name]
-            self.ev_flop_bets[players[i].name] += multiplier * self.flop_bets[players[i].name]
-            self.ev_turn_bets[players[i].name] += multiplier * self.turn_bets[players[i].name]
+        id0 = self.player_ids[players[0].name]
+        ev_preflop_bets, ev_flop_bets, ev_turn_bets = self.ev_preflop_bets, self.ev_flop_bets, self.ev_turn_bets
+        preflop_bets, flop_bets, turn_bets = self.preflop_bets, self.flop_bets, self.turn_bets
+        for delta, player_id in zip(round_state.deltas, (id0, 1 - id0)):
+            multiplier = (delta > 0) - (delta < 0)
+            ev_preflop_bets[player_id] += multiplier * preflop_bets[player_id]
+            ev_flop_bets[player_id] += multiplier * flop_bets[player_id]
+            ev_turn_bets[player_id] += multiplier * turn_bets[player_id]
         for player, player_message, delta in zip(players, self.player_messages, round_state.deltas):
-            player.query(round_state, player_message, self.log)
+            if player.sock is not None and player.game_clock > 0.:  # no ack from a dead bot
+                player.query(round_state, player_message, self.log)
             player.bankroll += delta
 
     def run(self):
@@ -567,28 +669,38 @@ class Game():
             Player(PLAYER_2_NAME, PLAYER_2_PATH)
         ]
 
-        for player in players:
-            player.build()
-        for player in players:
-            player.run()
+        # building and launching the bots are independent, so do both players at once,
+        # except that two builds of the same bot directory would race on its outputs
+        with ThreadPool(len(players)) as pool:
+            if os.path.realpath(PLAYER_1_PATH) == os.path.realpath(PLAYER_2_PATH):
+                for player in players:
+                    player.build()
+            else:
+                pool.map(Player.build, players)
+            pool.map(Player.run, players)
         for round_num in range(1, NUM_ROUNDS + 1):
             self.log.append('')
             self.log.append('Round #' + str(round_num) + STATUS(players))
             self.run_round(players)
-            players = players[::-1]
+            players[0], players[1] = players[1], players[0]
             
         self.log.append('')
         self.log.append('Final' + STATUS(players))
         
         for player in players:
-            self.log.append('{} preflop bets EV: {}'.format(player.name, self.ev_preflop_bets[player.name]))
-            self.log.append('{} flop bets EV: {}'.format(player.name, self.ev_flop_bets[player.name]))
-            self.log.append('{} turn bets EV: {}'.format(player.name, self.ev_turn_bets[player.name]))
+            player_id = self.player_ids[player.name]
+            self.log.append('{} preflop bets EV: {}'.format(player.name, self.ev_preflop_bets[player_id]))
+            self.log.append('{} flop bets EV: {}'.format(player.name, self.ev_flop_bets[player_id]))
+            self.log.append('{} turn bets EV: {}'.format(player.name, self.ev_turn_bets[player_id]))
             player.stop()
         name = GAME_LOG_FILENAME + '.txt'
         print('Writing', name)
-        with open(name, 'w') as log_file:
-            log_file.write('\n'.join(self.log))
+        # write in chunks rather than joining the whole match log into one string
+        with open(name, 'w', buffering=1 << 16) as log_file:
+            for start in range(0, len(self.log), LOG_WRITE_CHUNK):
+                if start:
+                    log_file.write('\n')
+                log_file.write('\n'.join(self.log[start:start + LOG_WRITE_CHUNK]))
 
 
 if __name__ == '__main__':
@@ -2,6 +2,8 @@
 Simple example pokerbot, written in Python.
 """
 
+import re
+
 from skeleton.actions import CallAction, CheckAction, FoldAction, RaiseAction, DiscardAction
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
@@ -68,6 +70,46 @@ contribution to the pot, and the legal actions available to me.
     "\n", " "
 ).strip()
 
+# Fixed opening of every conversation. It is built once and never mutated, so
+# each request starts with a byte-identical prefix that OpenAI's automatic
+# prompt caching can reuse instead of re-processing ROLE and GAME_RULES.
+PROMPT_PREFIX = (
+    {"role": "system", "content": ROLE},
+    {"role": "user", "content": GAME_RULES},
+    {"role": "assistant", "content": ASSISTANT_AGREES},
+)
+
+# Display name of each street, indexed by street number ("" for unused numbers)
+STREET_NAMES = (
+    "Pre-flop",
+    "",
+    "Flop (Discard Phase)",
+    "Flop (Discard Phase)",
+    "Post-Discard",
+    "Turn",
+    "River",
+)
+
+# A typed move: a one-word action, Raise/Discard with an integer, or a quit command
+_MOVE_RE = re.compile(r"(check|fold|call)|(raise|discard) +([+-]?\d+)|(q|quit)", re.IGNORECASE)
+
+# Legal actions in the order they are listed to the player, with their mask bits
+LEGAL_ACTION_NAMES = (
+    ("Discard", DiscardAction),
+    ("Raise", RaiseAction),
+    ("Fold", FoldAction),
+    ("Call", CallAction),
+    ("Check", CheckAction),
+)
+_ACTION_BIT = {action: 16 >> i for i, (_, action) in enumerate(LEGAL_ACTION_NAMES)}
+
+# "Your legal actions are: ..." for every legal-action bitmask
+_LEGAL_STRINGS = tuple(
+    "Your legal actions are: "
+    + ", ".join(name for name, action in LEGAL_ACTION_NAMES if mask & _ACTION_BIT[action])
+    for mask in range(32)
+)
+
 
 class Player(Bot):
     """
@@ -84,14 +126,19 @@ class Player(Bot):
         Returns:
         Nothing.
         """
-        self.messages = [
-            {"role": "system", "content": ROLE},
-            {"role": "user", "content": GAME_RULES},
-            {"role": "assistant", "content": ASSISTANT_AGREES},
-        ]
-        self.new_message = ""
+        self.messages = list(PROMPT_PREFIX)  # append-only, so earlier turns stay cacheable too
+        self._msg_parts = []  # fragments of the next user message, joined when sent
+        self._pending_context = ""  # last round's result, sent with the next prompt instead
         self.is_gpt = False
 
+    def _take_message(self):
+        """
+        Joins the pending message fragments into one user message and clears them.
+        """
+        message = "".join(self._msg_parts)
+        self._msg_parts.clear()
+        return message
+
     def handle_new_round(self, game_state, round_state, active):
         """
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -113,7 +160,10 @@ class Player(Bot):
             "================================NEW ROUND==================================="
         )
         print("You are", "big blind!" if big_blind else "small blind!")
-        self.new_message = "You are " + ("big blind!" if big_blind else "small blind!")
+        self._msg_parts.clear()
+        self._msg_parts.append(self._pending_context)
+        self._pending_context = ""
+        self._msg_parts.append("You are " + ("big blind!" if big_blind else "small blind!"))
 
     def handle_round_over(self, game_state, terminal_state, active):
         """
@@ -135,21 +185,15 @@ class Player(Bot):
         print()
         if opp_cards:
             print("Your opponent revealed", ", ".join(opp_cards))
-            self.new_message += " Your opponent revealed " + ", ".join(opp_cards) + "."
+            self._msg_parts.append(" Your opponent revealed " + ", ".join(opp_cards) + ".")
 
         print("This round, your bankroll changed by", str(my_delta) + "!")
-
-        self.new_message += (
-            " This round, your bankroll changed by "
-            + str(my_delta)
-            + "! Onto the next round - Say yes to continue."
-        )
         print()
 
         if self.is_gpt:
-            self.messages.append({"role": "user", "content": self.new_message})
-            response = chat(self.messages)
-            self.messages.append({"role": "assistant", "content": response})
+            # No separate message for the result: it rides along with the next round's first prompt
+            self._msg_parts.append(f" This round, your bankroll changed by {my_delta}!")
+            self._pending_context = self._take_message().lstrip() + " "
 
         ask = input("Press enter to continue, or q to quit!\n")
         if ask in ["q", "quit", "Quit"]:
@@ -196,54 +240,37 @@ class Player(Bot):
         )  # the number of chips your opponent has contributed to the pot
 
         # Street description for display
-        street_names = {
-            0: "Pre-flop",
-            2: "Flop (Discard Phase)",
-            3: "Flop (Discard Phase)",
-            4: "Post-Discard",
-            5: "Turn",
-            6: "River",
-        }
-        current_street = street_names.get(street, f"Street {street}")
+        current_street = STREET_NAMES[street] if 0 <= street < len(STREET_NAMES) else None
+        if not current_street:
+            current_street = f"Street {street}"
 
         print()
         print(f"=== {current_street} ===")
         print("Your current cards are:", ", ".join(my_cards))
-        self.new_message += " Your current cards are: " + ", ".join(my_cards) + "."
+        msg_parts = self._msg_parts
+        msg_parts.append(" Your current cards are: " + ", ".join(my_cards) + ".")
         if board_cards:
             print("The community cards are:", ", ".join(board_cards))
-            self.new_message += (
-                " The community cards are: " + ", ".join(board_cards) + "."
-            )
+            msg_parts.append(" The community cards are: " + ", ".join(board_cards) + ".")
         else:
             print("There are no community cards yet.")
-            self.new_message += " There are no community cards yet."
+            msg_parts.append(" There are no community cards yet.")
 
         print("Your current contribution to the pot is", my_contribution)
-        self.new_message += (
-            " Your current contribution to the pot is " + str(my_contribution) + "."
-        )
+        msg_parts.append(f" Your current contribution to the pot is {my_contribution}.")
         print("Your remaining stack is", my_stack)
-        self.new_message += " Your remaining stack is " + str(my_stack) + "."
+        msg_parts.append(f" Your remaining stack is {my_stack}.")
 
         if my_contribution != 1 and continue_cost > 0:
             print("Your opponent raised by", continue_cost)
-            self.new_message += " Your opponent raised by " + str(continue_cost) + "."
+            msg_parts.append(f" Your opponent raised by {continue_cost}.")
 
-        poss_actions = "Your legal actions are: "
-
-        if DiscardAction in legal_actions:
-            poss_actions += "Discard, "
-        if RaiseAction in legal_actions:
-            poss_actions += "Raise, "
-        if FoldAction in legal_actions:
-            poss_actions += "Fold, "
-        if CallAction in legal_actions:
-            poss_actions += "Call, "
-        if CheckAction in legal_actions:
-            poss_actions += "Check, "
-        print(poss_actions[:-2] + ".\n")
-        self.new_message += " " + poss_actions[:-2] + "."
+        mask = 0
+        for action in legal_actions:
+            mask |= _ACTION_BIT[action]
+        poss_actions = _LEGAL_STRINGS[mask]
+        print(poss_actions + ".\n")
+        msg_parts.append(" " + poss_actions + ".")
 
         if RaiseAction in legal_actions:
             min_raise, max_raise = (
@@ -259,7 +286,7 @@ class Player(Bot):
                 print(f"  {i}: {card}")
 
         if self.is_gpt:
-            self.messages.append({"role": "user", "content": self.new_message})
+            self.messages.append({"role": "user", "content": self._take_message()})
             response = chat(self.messages)
             self.messages.append({"role": "assistant", "content": response})
             print("GPT-4:", response)
@@ -272,40 +299,20 @@ class Player(Bot):
             else:
                 print("Error: GPT gave too many words.")
                 exit()
-            self.new_message = ""
         else:
-            user_input = input("Enter your move:\n")
-            act = None
-            num = None
-            while act is None:
-                parts = user_input.split(" ")
-                if parts[0] in ["Quit", "quit", "q"]:
-                    exit()
-                if len(parts) != 1 and len(parts) != 2:
-                    user_input = input("Too many words. Re-enter move: \n")
-                elif len(parts) == 1:
-                    act = parts[0].capitalize()
-                    if act not in ["Check", "Fold", "Call"]:
-                        act = None
-                        user_input = input(
-                            "One-word moves are only Check, Fold and Call. Re-enter move: \n"
-                        )
-                else:
-                    act, num = parts
-                    act = act.capitalize()
-                    if act not in ["Raise", "Discard"]:
-                        act = None
-                        user_input = input(
-                            "Two-word moves are only Raise and Discard. Re-enter move: \n"
-                        )
-                    else:
-                        try:
-                            num = int(num)
-                        except ValueError:
-                            act = None
-                            user_input = input(
-                                "Integer not entered for Raise/Discard. Enter new move: \n"
-                            )
+            match = _MOVE_RE.fullmatch(input("Enter your move:\n").strip())
+            while match is None:
+                match = _MOVE_RE.fullmatch(
+                    input("Moves are Check, Fold, Call, Raise x or Discard x. Re-enter move: \n").strip()
+                )
+            one_word, two_word, num, quit_word = match.groups()
+            if quit_word:
+                exit()
+            if one_word:
+                act = one_word.capitalize()
+            else:
+                act = two_word.capitalize()
+                num = int(num)
 
         if act == "Raise":
             return RaiseAction(num)
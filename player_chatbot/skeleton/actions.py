@@ -9,3 +9,8 @@ CheckAction = namedtuple('CheckAction', [])
 DiscardAction = namedtuple('DiscardAction', ['card'])## Card should be the index of the card in your hand [0,1,2]
 # we coalesce BetAction and RaiseAction for convenience
 RaiseAction = namedtuple('RaiseAction', ['amount'])
+
+# Shared instances of the actions that carry no payload, so they need not be rebuilt for every decision
+FOLD = FoldAction()
+CALL = CallAction()
+CHECK = CheckAction()
@@ -0,0 +1,97 @@
+# cython: language_level=3
+'''
+Compiled kernels for bucketing.py.
+
+Ranks and suits are read straight from the card strings through the tables
+hand_evaluator_c.pxd shares, indexed by character code. setup.py builds this
+module, and bucketing.py keeps its pure-Python versions when it has not been
+built.
+'''
+
+from hand_evaluator_c cimport RANK, SUIT
+
+# bound by configure() so the bucket strings come from bucketing.py
+cdef list PREFLOP_BUCKETS = None
+cdef int TEXTURE_EMPTY = 0
+
+
+def configure(list preflop_buckets, int texture_empty):
+    '''
+    Binds the preflop bucket for each (r0, r1, r2, suited) index and the empty-board texture id.
+    '''
+    global PREFLOP_BUCKETS, TEXTURE_EMPTY
+    PREFLOP_BUCKETS = preflop_buckets
+    TEXTURE_EMPTY = texture_empty
+
+
+def preflop_bucket(hole_cards):
+    '''
+    Bucket for 3-card preflop holdings.
+    '''
+    cdef str c0, c1, c2
+    cdef int r0, r1, r2
+    cdef bint is_suited
+    if len(hole_cards) != 3:
+        return "invalid"
+    c0, c1, c2 = hole_cards
+    r0 = RANK[ord(c0[0])]
+    if r0 < 0:
+        raise KeyError(c0)
+    r1 = RANK[ord(c1[0])]
+    if r1 < 0:
+        raise KeyError(c1)
+    r2 = RANK[ord(c2[0])]
+    if r2 < 0:
+        raise KeyError(c2)
+    is_suited = c0[1] == c1[1] or c0[1] == c2[1] or c1[1] == c2[1]
+    return PREFLOP_BUCKETS[((r0 * 13 + r1) * 13 + r2) * 2 + is_suited]
+
+
+def board_texture_id(tuple board_cards):
+    '''
+    Texture id of a tuple of cards, packed as in bucketing.py.
+    '''
+    cdef int rank_counts[13]
+    cdef int suit_counts[4]
+    cdef int n = len(board_cards)
+    cdef int i, rank, prev, max_count = 0, max_suit = 0, distinct = 0
+    cdef int base
+    cdef bint connected = True
+    cdef str card
+    if n == 0:
+        return TEXTURE_EMPTY
+
+    for i in range(13):
+        rank_counts[i] = 0
+    for i in range(4):
+        suit_counts[i] = 0
+    for card in board_cards:
+        rank = RANK[ord(card[0])]
+        if rank < 0:
+            raise KeyError(card[0])
+        rank_counts[rank] += 1
+        if rank_counts[rank] > max_count:
+            max_count = rank_counts[rank]
+        i = SUIT[ord(card[1])]
+        suit_counts[i] += 1
+        if suit_counts[i] > max_suit:
+            max_suit = suit_counts[i]
+
+    if max_count >= 3:
+        base = 2
+    elif max_count == 2:
+        base = 1
+    else:
+        base = 0
+
+    # straight potential: 3+ distinct ranks with no gap larger than 2
+    prev = -1
+    for rank in range(12, -1, -1):
+        if rank_counts[rank]:
+            if prev >= 0 and prev - rank > 2:
+                connected = False
+            prev = rank
+            distinct += 1
+    connected = connected and n >= 3 and distinct >= 3
+
+    return (base << 2) | ((max_suit >= 3) << 1) | connected
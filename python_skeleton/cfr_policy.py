@@ -3,81 +3,179 @@ Runtime policy module that loads trained MCCFR strategy and makes decisions.
 Used by the Player bot during actual gameplay.
 '''
 
+import gzip
 import os
 import pickle
 import random
+import sys
 from collections import defaultdict
-from bucketing import get_infoset_key
-from hand_evaluator import evaluate_hand, compare_hands, RANK_VALUES
+from bisect import bisect_right
+from itertools import accumulate, islice
+from bucketing import get_infoset_key, get_preflop_bucket, parse_infoset_key
+from hand_evaluator import evaluate_hands, RANK_VALUES, RANKS, SUITS
 from game_abstraction import (
     ACTION_FOLD, ACTION_CHECK_CALL, ACTION_BET_33, ACTION_BET_66,
-    ACTION_BET_POT, ACTION_ALL_IN, ACTION_DISCARD_0, ACTION_DISCARD_1, ACTION_DISCARD_2
+    ACTION_BET_POT, ACTION_ALL_IN, ACTION_DISCARD_0, ACTION_DISCARD_1, ACTION_DISCARD_2,
+    NUM_ACTIONS, BET_PERCENT
 )
-from skeleton.actions import FoldAction, CallAction, CheckAction, RaiseAction, DiscardAction
+from skeleton.actions import FoldAction, CallAction, CheckAction, RaiseAction, DiscardAction, FOLD, CALL, CHECK
 from skeleton.states import STARTING_STACK, BIG_BLIND
 
+# Abstract actions when raising is illegal, by (fold legal, check/call legal)
+_NO_RAISE_ACTIONS = {
+    (False, False): (),
+    (False, True): (ACTION_CHECK_CALL,),
+    (True, False): (ACTION_FOLD,),
+    (True, True): (ACTION_FOLD, ACTION_CHECK_CALL),
+}
+_DISCARD_ACTIONS = (ACTION_DISCARD_0, ACTION_DISCARD_1, ACTION_DISCARD_2)
+_EMPTY_ROW = (0.0,) * NUM_ACTIONS  # strategy row for infosets missing from the strategy
+_GZIP_MAGIC = b'\x1f\x8b'  # first bytes of strategy files saved with compress=True
+
+# Every card in the deck with its bit in a 52-bit card-set mask, for building Monte Carlo decks
+ALL_CARDS = tuple(sys.intern(r + s) for r in RANKS for s in SUITS)
+CARD_BITS = {card: 1 << i for i, card in enumerate(ALL_CARDS)}
+# Interned card strings, so equal cards share identity and cached tuple keys compare by `is`
+CANONICAL_CARDS = {card: card for card in ALL_CARDS}
+
+
+def _canon(cards):
+    """Swap each card string for its interned copy from CANONICAL_CARDS."""
+    return [CANONICAL_CARDS[card] for card in cards]
+
+
+EQUITY_BATCH = 8  # rollouts scored per batch in _estimate_equity
+OPPONENTS_PER_RUNOUT = 4  # opponent hands paired with each sampled board runout
+
+# Average equity of each preflop bucket against a random hand, from
+# compute_preflop_equity(seed=2026) with the other defaults, on the pure-Python
+# equity path (_equity_c = None); the compiled kernel draws its samples in a
+# different order, so it gives slightly different values
+PREFLOP_EQUITY = {
+    'high_offsuit': 0.663, 'high_pair': 0.818, 'high_suited': 0.697, 'low': 0.595,
+    'low_pair': 0.663, 'mid_offsuit': 0.623, 'mid_pair': 0.765, 'mid_suited': 0.651,
+    'trips_0': 0.869, 'trips_1': 0.881, 'trips_2': 0.895, 'trips_3': 0.908,
+    'trips_4': 0.913, 'trips_5': 0.918, 'trips_6': 0.928, 'trips_7': 0.931,
+    'trips_8': 0.941, 'trips_9': 0.942, 'trips_10': 0.941, 'trips_11': 0.944,
+    'trips_12': 0.95,
+}
+
+
+def _wilson_interval(p, n, z=1.96):
+    """95% Wilson score interval for a proportion p observed over n independent trials."""
+    z2_n = z * z / n
+    center = (p + z2_n / 2) / (1 + z2_n)
+    half_width = z * (p * (1 - p) / n + z2_n / (4 * n)) ** 0.5 / (1 + z2_n)
+    return center - half_width, center + half_width
+
 
 class CFRPolicy:
     """
     Loads and queries a trained MCCFR strategy for decision making.
     """
     
-    def __init__(self, strategy_path=None):
+    def __init__(self, strategy_path=None, seed=None):
         """
         Initialize policy.
         
         Args:
             strategy_path: Path to saved strategy file (pickle). If None, uses fallback heuristic.
+            seed: Seed for this policy's random number generator (optional)
         """
-        self.strategy_sum = defaultdict(lambda: defaultdict(float))
+        # infoset -> cumulative strategy per action code, as a flat row indexed by action
+        self.strategy_rows = {}
         self.has_strategy = False
         
+        # Own RNG and reusable rollout buffers for Monte Carlo sampling
+        self._rng = random.Random(seed)
+        self._my_hands = []
+        self._opp_hands = []
+        
+        # (infoset, legal actions) -> normalized strategy, kept until the strategy is reloaded
+        self._strategy_cache = {}
+        
+        # Per-hand memos, cleared by reset_hand()
+        self._infoset_cache = {}
+        self._legal_cache = {}
+        self._deck_cache = {}
+        
         if strategy_path and os.path.exists(strategy_path):
             self.load_strategy(strategy_path)
     
     def load_strategy(self, filepath):
-        """Load strategy from file."""
+        """Load strategy from file, gzipped or not."""
         try:
             with open(filepath, 'rb') as f:
-                data = pickle.load(f)
+                compressed = f.read(2) == _GZIP_MAGIC
+                f.seek(0)
+                data = pickle.load(gzip.GzipFile(fileobj=f) if compressed else f)
             
-            for infoset, actions in data['strategy_sum'].items():
+            if 'values' in data:
+                # Flat rows from MCCFRTrainer.save_compact_strategy; quantized rows
+                # stay integers, since get_strategy only uses their proportions
+                values = data['values']
+                num_actions = data['num_actions']
+                rows = self.strategy_rows
+                for i, infoset in enumerate(data['keys']):
+                    rows[infoset] = tuple(values[i * num_actions:(i + 1) * num_actions])
+            
+            for infoset, actions in data.get('strategy_sum', {}).items():
+                if isinstance(infoset, str):
+                    # Strategies saved before infoset keys were packed integers
+                    infoset = parse_infoset_key(infoset)
+                row = [0.0] * NUM_ACTIONS
                 for action, value in actions.items():
-                    self.strategy_sum[infoset][action] = value
+                    row[action] = value
+                self.strategy_rows[infoset] = tuple(row)
             
+            self._strategy_cache.clear()
             self.has_strategy = True
-            print(f"Loaded strategy with {len(self.strategy_sum)} infosets")
+            print(f"Loaded strategy with {len(self.strategy_rows)} infosets")
         except Exception as e:
             print(f"Warning: Failed to load strategy from {filepath}: {e}")
             self.has_strategy = False
     
+    def reset_hand(self):
+        """Drop the per-hand infoset, legal-action and deck memos. Call at the start of each hand."""
+        self._infoset_cache.clear()
+        self._legal_cache.clear()
+        self._deck_cache.clear()
+    
     def get_strategy(self, infoset, legal_actions):
         """
         Get strategy for an information set.
         
         Args:
             infoset: Information set key
-            legal_actions: List of legal action codes
+            legal_actions: Tuple of legal action codes
         
         Returns:
-            Dict mapping action -> probability
+            Dict mapping action -> probability. Strategies are memoized and
+            shared between calls, so callers must not modify them.
         """
         if not legal_actions:
             return {}
+        if len(legal_actions) == 1:
+            # Forced action, whatever the row holds
+            return {legal_actions[0]: 1.0}
         
-        strategy_totals = self.strategy_sum.get(infoset, {})
-        total = sum(strategy_totals.get(action, 0.0) for action in legal_actions)
+        cache_key = (infoset, legal_actions)
+        strategy = self._strategy_cache.get(cache_key)
+        if strategy is not None:
+            return strategy
+        
+        # Gather the legal actions' entries from the row once
+        row = self.strategy_rows.get(infoset, _EMPTY_ROW)
+        values = [row[action] for action in legal_actions]
+        total = sum(values)
         
         if total <= 0:
             # No data for this infoset, use uniform
-            prob = 1.0 / len(legal_actions)
-            return {action: prob for action in legal_actions}
-        
-        # Normalize
-        strategy = {}
-        for action in legal_actions:
-            strategy[action] = strategy_totals.get(action, 0.0) / total
-        
+            strategy = dict.fromkeys(legal_actions, 1.0 / len(legal_actions))
+        else:
+            # Normalize
+            strategy = dict(zip(legal_actions, [value / total for value in values]))
+        self._strategy_cache[cache_key] = strategy
         return strategy
     
     def sample_action(self, strategy):
@@ -85,10 +183,10 @@ class CFRPolicy:
         if not strategy:
             return None
         
-        actions = list(strategy.keys())
-        probs = [strategy[a] for a in actions]
-        
-        return random.choices(actions, weights=probs)[0]
+        # Same draw as random.choices, without its argument handling and result list
+        cum_probs = list(accumulate(strategy.values()))
+        i = bisect_right(cum_probs, self._rng.random() * cum_probs[-1], 0, len(cum_probs) - 1)
+        return list(strategy)[i]
     
     def get_discard_decision(self, my_cards, board_cards, player_id, position):
         """
@@ -105,6 +203,8 @@ class CFRPolicy:
         """
         if len(my_cards) != 3:
             return 0
+        my_cards = _canon(my_cards)
+        board_cards = _canon(board_cards)
         
         # Build infoset
         infoset = get_infoset_key(
@@ -118,10 +218,8 @@ class CFRPolicy:
             position=position
         )
         
-        legal_actions = [ACTION_DISCARD_0, ACTION_DISCARD_1, ACTION_DISCARD_2]
-        
         if self.has_strategy:
-            strategy = self.get_strategy(infoset, legal_actions)
+            strategy = self.get_strategy(infoset, _DISCARD_ACTIONS)
             action = self.sample_action(strategy)
             return action - ACTION_DISCARD_0
         else:
@@ -132,24 +230,18 @@ class CFRPolicy:
         """
         Heuristic discard: keep the two cards that make the best hand with the board.
         """
-        best_discard = 0
-        best_strength = -1
+        board = tuple(board_cards)
+        kept_pairs = [tuple(my_cards[i] for i in range(3) if i != discard_idx) for discard_idx in range(3)]
         
-        for discard_idx in range(3):
-            kept_cards = [my_cards[i] for i in range(3) if i != discard_idx]
-            all_cards = kept_cards + board_cards
-            
-            if len(all_cards) >= 5:
-                strength = evaluate_hand(tuple(all_cards))
-            else:
-                # Not enough cards, just use rank sum
-                strength = sum(RANK_VALUES[card[0]] for card in kept_cards)
-            
-            if strength > best_strength:
-                best_strength = strength
-                best_discard = discard_idx
+        if len(board) >= 3:
+            # Score all three candidate hands in one batch
+            strengths = evaluate_hands([kept + board for kept in kept_pairs])
+        else:
+            # Not enough cards, just use rank sum
+            strengths = [sum(RANK_VALUES[card[0]] for card in kept) for kept in kept_pairs]
         
-        return best_discard
+        # First index of the strongest hand, as a strict > scan would pick
+        return max(range(3), key=strengths.__getitem__)
     
     def get_betting_decision(self, my_cards, board_cards, discarded_by_us, discarded_by_opp,
                              street, my_pip, opp_pip, my_stack, opp_stack, pot,
@@ -171,22 +263,36 @@ class CFRPolicy:
             legal_actions: Set of legal engine actions
             player_id: 0 or 1
             position: True if button
-            betting_history: List of action strings this street
+            betting_history: List of action strings this street, or packed history int
         
         Returns:
             Engine action object (FoldAction, CallAction, CheckAction, RaiseAction)
         """
-        # Build infoset
-        infoset = get_infoset_key(
-            player_id=player_id,
-            hole_cards=my_cards,
-            board_cards=board_cards,
-            discarded_by_us=discarded_by_us,
-            discarded_by_opp=discarded_by_opp,
-            street=street,
-            betting_history=betting_history,
-            position=position
-        )
+        my_cards = _canon(my_cards)
+        board_cards = _canon(board_cards)
+        if discarded_by_us:
+            discarded_by_us = CANONICAL_CARDS[discarded_by_us]
+        if discarded_by_opp:
+            discarded_by_opp = CANONICAL_CARDS[discarded_by_opp]
+        
+        # Build infoset, reusing it if this spot was already seen this hand
+        infoset_args = (street, tuple(my_cards), tuple(board_cards), discarded_by_us,
+                        discarded_by_opp,
+                        betting_history if isinstance(betting_history, int) else tuple(betting_history),
+                        position)
+        infoset = self._infoset_cache.get(infoset_args)
+        if infoset is None:
+            infoset = get_infoset_key(
+                player_id=player_id,
+                hole_cards=my_cards,
+                board_cards=board_cards,
+                discarded_by_us=discarded_by_us,
+                discarded_by_opp=discarded_by_opp,
+                street=street,
+                betting_history=betting_history,
+                position=position
+            )
+            self._infoset_cache[infoset_args] = infoset
         
         # Map engine actions to abstract actions
         abstract_actions = self._map_legal_actions(
@@ -196,14 +302,16 @@ class CFRPolicy:
         if not abstract_actions:
             # Fallback
             if CheckAction in legal_actions:
-                return CheckAction()
+                return CHECK
             elif CallAction in legal_actions:
-                return CallAction()
+                return CALL
             else:
-                return FoldAction()
+                return FOLD
         
-        # Get strategy
-        if self.has_strategy:
+        if len(abstract_actions) == 1:
+            # Only one choice, so there is nothing to look up or sample
+            action = abstract_actions[0]
+        elif self.has_strategy:
             strategy = self.get_strategy(infoset, abstract_actions)
             action = self.sample_action(strategy)
         else:
@@ -222,6 +330,21 @@ class CFRPolicy:
         """
         Map engine legal actions to abstract action codes.
         """
+        if RaiseAction not in legal_actions:
+            # No bet sizes to check, so the result depends only on fold/check/call legality
+            return _NO_RAISE_ACTIONS[FoldAction in legal_actions,
+                                     CheckAction in legal_actions or CallAction in legal_actions]
+        
+        legal_args = (frozenset(legal_actions), my_pip, opp_pip, my_stack, pot)
+        abstract = self._legal_cache.get(legal_args)
+        if abstract is None:
+            abstract = self._legal_cache[legal_args] = self._compute_legal_actions(
+                legal_actions, my_pip, opp_pip, my_stack, pot
+            )
+        return abstract
+    
+    def _compute_legal_actions(self, legal_actions, my_pip, opp_pip, my_stack, pot):
+        """Uncached _map_legal_actions."""
         abstract = []
         
         facing_bet = opp_pip > my_pip
@@ -247,46 +370,28 @@ class CFRPolicy:
                     abstract.append(ACTION_BET_POT)
                 abstract.append(ACTION_ALL_IN)
         
-        return abstract
+        return tuple(abstract)
     
     def _abstract_to_engine_action(self, action, legal_actions, my_pip, opp_pip, my_stack, pot):
         """
         Convert abstract action code to engine action object.
         """
         if action == ACTION_FOLD:
-            return FoldAction()
-        
-        if action == ACTION_CHECK_CALL:
-            if CheckAction in legal_actions:
-                return CheckAction()
-            else:
-                return CallAction()
+            return FOLD
         
         # Betting/raising actions
-        if action in [ACTION_BET_33, ACTION_BET_66, ACTION_BET_POT, ACTION_ALL_IN]:
-            if RaiseAction not in legal_actions:
-                # Can't raise, fall back to call or check
-                if CheckAction in legal_actions:
-                    return CheckAction()
-                else:
-                    return CallAction()
-            
+        if ACTION_BET_33 <= action <= ACTION_ALL_IN and RaiseAction in legal_actions:
             # Compute bet size
             facing_bet = opp_pip > my_pip
             amount_to_call = opp_pip - my_pip if facing_bet else 0
-            current_pot = pot + amount_to_call
             
-            if action == ACTION_BET_33:
-                bet_size = int(current_pot * 0.33)
-            elif action == ACTION_BET_66:
-                bet_size = int(current_pot * 0.66)
-            elif action == ACTION_BET_POT:
-                bet_size = current_pot
-            else:  # ALL_IN
+            if action == ACTION_ALL_IN:
                 bet_size = my_stack - amount_to_call
+            else:
+                # Integer percent of the pot, rounded down as in GameState.apply_action
+                bet_size = (pot + amount_to_call) * BET_PERCENT[action] // 100
             
             # Ensure bet is in legal range
-            from skeleton.states import RoundState
             # We don't have RoundState here, so approximate
             min_raise = amount_to_call + max(amount_to_call, BIG_BLIND)
             max_raise = my_stack
@@ -296,30 +401,38 @@ class CFRPolicy:
             
             return RaiseAction(total_contribution)
         
-        # Default fallback
+        # Check/call, or a bet that can't be made
         if CheckAction in legal_actions:
-            return CheckAction()
-        elif CallAction in legal_actions:
-            return CallAction()
+            return CHECK
+        elif action <= ACTION_ALL_IN or CallAction in legal_actions:
+            return CALL
         else:
-            return FoldAction()
+            return FOLD
     
     def _heuristic_betting(self, my_cards, board_cards, discarded_by_us, discarded_by_opp,
                            my_pip, opp_pip, my_stack, pot, abstract_actions):
         """
         Simple heuristic betting based on hand strength and pot odds.
         """
-        # Estimate hand strength via Monte Carlo sampling
-        equity = self._estimate_equity(my_cards, board_cards, discarded_by_us, 
-                                       discarded_by_opp, num_samples=50)
-        
         facing_bet = opp_pip > my_pip
         amount_to_call = opp_pip - my_pip if facing_bet else 0
+        if facing_bet:
+            pot_odds = amount_to_call / (pot + amount_to_call)
+            thresholds = (pot_odds * 0.8, 0.65)
+        else:
+            thresholds = (0.45, 0.6)
+        
+        if not board_cards and len(my_cards) == 3:
+            # Preflop equity only depends on the bucket, so it is precomputed
+            equity = PREFLOP_EQUITY[get_preflop_bucket(my_cards)]
+        else:
+            # Estimate hand strength via Monte Carlo sampling, stopping once the
+            # equity is clearly on one side of every threshold used below
+            equity = self._estimate_equity(my_cards, board_cards, discarded_by_us, 
+                                           discarded_by_opp, num_samples=50, thresholds=thresholds)
         
         # Simple strategy based on equity
         if facing_bet:
-            pot_odds = amount_to_call / (pot + amount_to_call)
-            
             if equity < pot_odds * 0.8:
                 # Bad pot odds, fold
                 if ACTION_FOLD in abstract_actions:
@@ -342,7 +455,7 @@ class CFRPolicy:
                 return ACTION_CHECK_CALL
             elif equity > 0.45:
                 # Medium hand, small bet or check
-                if random.random() < 0.5 and ACTION_BET_33 in abstract_actions:
+                if self._rng.random() < 0.5 and ACTION_BET_33 in abstract_actions:
                     return ACTION_BET_33
                 return ACTION_CHECK_CALL
             else:
@@ -350,53 +463,125 @@ class CFRPolicy:
                 return ACTION_CHECK_CALL
     
     def _estimate_equity(self, my_cards, board_cards, discarded_by_us, 
-                        discarded_by_opp, num_samples=50):
+                        discarded_by_opp, num_samples=50, thresholds=()):
         """
         Estimate equity via Monte Carlo sampling.
+        
+        Each sampled board runout is shared by OPPONENTS_PER_RUNOUT opponent hands, so
+        our own hand is scored once per runout rather than once per sample. Samples are
+        drawn in batches of EQUITY_BATCH. With thresholds given, sampling
+        stops early once the 95% Wilson interval around the estimate contains none of
+        them, since more samples would not change which side of each threshold it is on.
+        Outcomes on the same runout are strongly correlated, so the interval is sized
+        by the number of runouts rather than the number of samples.
+        
+        Runs in the compiled kernel from equity_c.pyx when it is available.
         """
         if not my_cards:
             return 0.5
         
-        # Build deck of remaining cards
-        all_known = set(my_cards + board_cards)
+        # Build deck of remaining cards from a bitmask of the known ones
+        known_mask = 0
+        for card in my_cards:
+            known_mask |= CARD_BITS[card]
+        for card in board_cards:
+            known_mask |= CARD_BITS[card]
         if discarded_by_us:
-            all_known.add(discarded_by_us)
+            known_mask |= CARD_BITS[discarded_by_us]
         if discarded_by_opp:
-            all_known.add(discarded_by_opp)
+            known_mask |= CARD_BITS[discarded_by_opp]
+        
+        # Reuse the deck across decisions while the known cards stay the same
+        deck = self._deck_cache.get(known_mask)
+        if deck is None:
+            deck = self._deck_cache[known_mask] = tuple(
+                card for card, bit in CARD_BITS.items() if not known_mask & bit
+            )
         
-        from hand_evaluator import RANKS, SUITS
-        deck = [r + s for r in RANKS for s in SUITS if r + s not in all_known]
+        # Opponent has some cards (we don't know how many they kept);
+        # complete the board to 6 cards
+        board = tuple(board_cards)
+        mine = tuple(my_cards) + board
+        cards_needed = 6 - len(board_cards)
+        draw_size = cards_needed + 2 * OPPONENTS_PER_RUNOUT
+        if _equity_c is not None:
+            return _equity_c.estimate_equity(deck, mine, board, num_samples, EQUITY_BATCH,
+                                             OPPONENTS_PER_RUNOUT, tuple(thresholds),
+                                             self._rng.getrandbits(64))
+        
+        sample = self._rng.sample
+        my_hands = self._my_hands
+        opp_hands = self._opp_hands
         
         wins = 0
         ties = 0
-        
-        for _ in range(num_samples):
-            # Sample opponent cards and remaining board
-            random.shuffle(deck)
-            
-            # Opponent has some cards (we don't know how many they kept)
-            opp_cards = deck[:2]
-            remaining_deck = deck[2:]
+        n = 0
+        runouts = 0
+        while n < num_samples:
+            # Draw only the cards each runout needs instead of shuffling the whole deck:
+            # the runout followed by disjoint two-card opponent hands
+            my_hands.clear()
+            opp_hands.clear()
+            batch = min(EQUITY_BATCH, num_samples - n)
+            for start in range(0, batch, OPPONENTS_PER_RUNOUT):
+                drawn = tuple(sample(deck, draw_size))
+                runouts += 1
+                runout = drawn[:cards_needed]
+                my_hands.append(mine + runout)
+                shared = board + runout
+                for i in range(cards_needed, cards_needed + 2 * min(OPPONENTS_PER_RUNOUT, batch - start), 2):
+                    opp_hands.append(drawn[i:i + 2] + shared)
             
-            # Complete the board if needed
-            cards_needed = 6 - len(board_cards)  # Target is 6 board cards total
-            sampled_board = board_cards + remaining_deck[:cards_needed]
+            opp_scores = iter(evaluate_hands(opp_hands))
+            for my_score in evaluate_hands(my_hands):
+                for opp_score in islice(opp_scores, OPPONENTS_PER_RUNOUT):
+                    if my_score > opp_score:
+                        wins += 1
+                    elif my_score == opp_score:
+                        ties += 1
+            n += len(opp_hands)
             
-            # Evaluate hands
-            my_hand = my_cards + sampled_board
-            opp_hand = opp_cards + sampled_board
-            
-            result = compare_hands(my_hand, opp_hand)
-            
-            if result > 0:
-                wins += 1
-            elif result == 0:
-                ties += 1
-        
-        equity = (wins + 0.5 * ties) / num_samples
+            # The Wilson interval assumes independent win/lose trials, with a tie as half a win;
+            # only one outcome per runout is independent, so it gets the runout count
+            if thresholds and n < num_samples:
+                lower, upper = _wilson_interval((wins + 0.5 * ties) / n, runouts)
+                if not any(lower <= threshold <= upper for threshold in thresholds):
+                    break
+        
+        equity = (wins + 0.5 * ties) / n
         return equity
 
 
+def compute_preflop_equity(hands_per_bucket=300, num_samples=200, seed=None):
+    """
+    Regenerate PREFLOP_EQUITY: average Monte Carlo equity over hands drawn from each preflop bucket.
+    
+    Returns:
+        Dict mapping preflop bucket -> equity rounded to 3 places
+    """
+    from itertools import combinations
+    
+    hands_by_bucket = defaultdict(list)
+    for hand in combinations(ALL_CARDS, 3):
+        hands_by_bucket[get_preflop_bucket(hand)].append(list(hand))
+    
+    policy = CFRPolicy(seed=seed)
+    rng = random.Random(seed)
+    equity = {}
+    for bucket, hands in hands_by_bucket.items():
+        total = sum(policy._estimate_equity(rng.choice(hands), [], None, None, num_samples=num_samples)
+                    for _ in range(hands_per_bucket))
+        equity[bucket] = round(total / hands_per_bucket, 3)
+    return equity
+
+
+# Prefer the compiled equity kernel from equity_c.pyx when setup.py has built it
+try:
+    import equity_c as _equity_c
+except ImportError:
+    _equity_c = None
+
+
 if __name__ == "__main__":
     # Test the policy
     print("Testing CFR policy...")
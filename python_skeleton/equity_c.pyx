@@ -0,0 +1,116 @@
+# cython: language_level=3
+'''
+Compiled Monte Carlo equity kernel for cfr_policy.py.
+
+Hands are scored by hand_evaluator_c, giving the same scores as
+hand_evaluator.evaluate_hand, and rollouts are drawn with a splitmix64 generator
+seeded by the caller. setup.py builds this module, and cfr_policy.py keeps its
+pure-Python sampling loop when it has not been built.
+'''
+from libc.math cimport sqrt
+from libc.stdint cimport uint64_t
+from hand_evaluator_c cimport MAX_CARDS, MAX_HAND, RANK, SUIT, score
+
+
+cdef inline uint64_t _next(uint64_t* state):
+    '''
+    splitmix64 step.
+    '''
+    cdef uint64_t z
+    state[0] += <uint64_t>0x9E3779B97F4A7C15
+    z = state[0]
+    z = (z ^ (z >> 30)) * <uint64_t>0xBF58476D1CE4E5B9
+    z = (z ^ (z >> 27)) * <uint64_t>0x94D049BB133111EB
+    return z ^ (z >> 31)
+
+
+def estimate_equity(tuple deck, tuple mine, tuple board, int num_samples, int batch_size,
+                    int opponents_per_runout, tuple thresholds, uint64_t seed):
+    '''
+    Share of num_samples rollouts that our cards win (ties count half) against a
+    random two-card opponent hand, with the board completed to 6 cards.
+
+    Mirrors the pure-Python loop in CFRPolicy._estimate_equity: each sampled runout
+    is shared by opponents_per_runout opponent hands, and after every batch_size
+    samples it stops once the 95% Wilson interval, sized by the number of runouts,
+    contains none of the thresholds.
+    '''
+    cdef int deck_ranks[MAX_CARDS]
+    cdef int deck_suits[MAX_CARDS]
+    cdef int my_ranks[MAX_HAND]
+    cdef int my_suits[MAX_HAND]
+    cdef int opp_ranks[MAX_HAND]
+    cdef int opp_suits[MAX_HAND]
+    cdef int num_deck = len(deck), num_mine = len(mine), num_board = len(board)
+    cdef int cards_needed = 6 - num_board
+    cdef int wins = 0, ties = 0, n = 0, runouts = 0, batch, start, opponents, i, j, k, tmp
+    cdef long my_score, opp_score
+    cdef double p, z2_n, center, half_width, lower, upper
+    cdef uint64_t state = seed
+    cdef str card
+    cdef bint stop
+
+    if num_mine + cards_needed > MAX_HAND or num_board + 2 + cards_needed > MAX_HAND:
+        raise ValueError("too many cards for the equity kernel")
+    for i in range(num_deck):
+        card = deck[i]
+        deck_ranks[i] = RANK[ord(card[0])]
+        deck_suits[i] = SUIT[ord(card[1])]
+    for i in range(num_mine):
+        card = mine[i]
+        my_ranks[i] = RANK[ord(card[0])]
+        my_suits[i] = SUIT[ord(card[1])]
+    for i in range(num_board):
+        card = board[i]
+        opp_ranks[2 + i] = RANK[ord(card[0])]
+        opp_suits[2 + i] = SUIT[ord(card[1])]
+
+    while n < num_samples:
+        batch = min(batch_size, num_samples - n)
+        start = 0
+        while start < batch:
+            opponents = min(opponents_per_runout, batch - start)
+            runouts += 1
+            # Partial Fisher-Yates: the runout, then disjoint two-card opponent hands
+            for i in range(cards_needed + 2 * opponents):
+                j = i + <int>(_next(&state) % <uint64_t>(num_deck - i))
+                tmp = deck_ranks[i]; deck_ranks[i] = deck_ranks[j]; deck_ranks[j] = tmp
+                tmp = deck_suits[i]; deck_suits[i] = deck_suits[j]; deck_suits[j] = tmp
+            for i in range(cards_needed):
+                my_ranks[num_mine + i] = deck_ranks[i]
+                my_suits[num_mine + i] = deck_suits[i]
+                opp_ranks[2 + num_board + i] = deck_ranks[i]
+                opp_suits[2 + num_board + i] = deck_suits[i]
+            my_score = score(my_ranks, my_suits, num_mine + cards_needed)
+            for k in range(opponents):
+                j = cards_needed + 2 * k
+                opp_ranks[0] = deck_ranks[j]
+                opp_suits[0] = deck_suits[j]
+                opp_ranks[1] = deck_ranks[j + 1]
+                opp_suits[1] = deck_suits[j + 1]
+                opp_score = score(opp_ranks, opp_suits, 2 + num_board + cards_needed)
+                if my_score > opp_score:
+                    wins += 1
+                elif my_score == opp_score:
+                    ties += 1
+            start += opponents
+        n += batch
+
+        # The Wilson interval assumes independent win/lose trials, with a tie as half a win;
+        # only one outcome per runout is independent, so it gets the runout count
+        if thresholds and n < num_samples:
+            p = (wins + 0.5 * ties) / n
+            z2_n = 1.96 * 1.96 / runouts
+            center = (p + z2_n / 2) / (1 + z2_n)
+            half_width = 1.96 * sqrt(p * (1 - p) / runouts + z2_n / (4 * runouts)) / (1 + z2_n)
+            lower = center - half_width
+            upper = center + half_width
+            stop = True
+            for threshold in thresholds:
+                if lower <= threshold <= upper:
+                    stop = False
+                    break
+            if stop:
+                break
+
+    return (wins + 0.5 * ties) / n
@@ -42,7 +42,7 @@ def example_bucketing():
     print("Example 2: Bucketing")
     print("=" * 60)
     
-    from bucketing import get_preflop_bucket, get_postflop_bucket, get_infoset_key
+    from bucketing import get_preflop_bucket, get_postflop_bucket, get_infoset_key, infoset_key_to_str
     
     # Preflop example
     hole_cards = ["As", "Ah", "Kd"]
@@ -67,7 +67,7 @@ def example_bucketing():
         betting_history=["1", "2"],
         position=True
     )
-    print(f"\nFull infoset key: {infoset}")
+    print(f"\nFull infoset key: {infoset} ({infoset_key_to_str(infoset)})")
 
 
 def example_game_simulation():
@@ -118,17 +118,18 @@ def example_training():
     
     # Show a sample infoset
     if trainer.strategy_sum:
-        infoset = list(trainer.strategy_sum.keys())[0]
-        print(f"\nSample infoset: {infoset}")
+        infoset = next(iter(trainer.strategy_sum))
+        from bucketing import infoset_key_to_str
+        print(f"\nSample infoset: {infoset_key_to_str(infoset)}")
         
         from game_abstraction import ACTION_NAMES
         actions = trainer.strategy_sum[infoset]
-        total = sum(actions.values())
+        total = sum(actions)
         
         print("Strategy:")
-        for action, count in list(actions.items())[:3]:
+        for action, count in [(action, count) for action, count in enumerate(actions) if count][:3]:
             prob = count / total if total > 0 else 0
-            action_name = ACTION_NAMES.get(int(action), f"Action {action}")
+            action_name = ACTION_NAMES[action]
             print(f"  {action_name}: {prob:.3f}")
 
 
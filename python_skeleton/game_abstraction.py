@@ -4,9 +4,10 @@ Represents the poker game state with action abstraction.
 '''
 
 import random
-from copy import deepcopy
-from hand_evaluator import evaluate_hand, compare_hands, RANKS, SUITS
-from bucketing import get_infoset_key
+import sys
+from collections import namedtuple
+from hand_evaluator import evaluate_hand, RANKS, SUITS
+from bucketing import get_infoset_key, append_history, HISTORY_SHIFT
 
 
 # Action abstraction
@@ -20,34 +21,83 @@ ACTION_DISCARD_0 = 6  # Discard card at index 0
 ACTION_DISCARD_1 = 7
 ACTION_DISCARD_2 = 8
 
-ACTION_NAMES = {
-    ACTION_FOLD: "FOLD",
-    ACTION_CHECK_CALL: "CHECK/CALL",
-    ACTION_BET_33: "BET_33",
-    ACTION_BET_66: "BET_66",
-    ACTION_BET_POT: "BET_POT",
-    ACTION_ALL_IN: "ALL_IN",
-    ACTION_DISCARD_0: "DISCARD_0",
-    ACTION_DISCARD_1: "DISCARD_1",
-    ACTION_DISCARD_2: "DISCARD_2",
-}
+# Name of each action, indexed by action code
+ACTION_NAMES = (
+    "FOLD",        # ACTION_FOLD
+    "CHECK/CALL",  # ACTION_CHECK_CALL
+    "BET_33",      # ACTION_BET_33
+    "BET_66",      # ACTION_BET_66
+    "BET_POT",     # ACTION_BET_POT
+    "ALL_IN",      # ACTION_ALL_IN
+    "DISCARD_0",   # ACTION_DISCARD_0
+    "DISCARD_1",   # ACTION_DISCARD_1
+    "DISCARD_2",   # ACTION_DISCARD_2
+)
+NUM_ACTIONS = len(ACTION_NAMES)
 
 # Game constants
 STARTING_STACK = 400
 BIG_BLIND = 2
 SMALL_BLIND = 1
 
+# Pot percentage of each sized bet, so bet sizes and thresholds stay in integers
+BET_PERCENT = {ACTION_BET_33: 33, ACTION_BET_66: 66, ACTION_BET_POT: 100}
+
+FULL_DECK = tuple(sys.intern(rank + suit) for rank in RANKS for suit in SUITS)
+CARDS_DEALT = 10  # 3 hole cards each, 2 flop cards, then the turn and river
+
+# What apply_action changed, so that GameState.undo can put it back without copying the state
+Undo = namedtuple('Undo', [
+    'action', 'player', 'hole_len', 'prev_discarded', 'deck_len', 'num_streets', 'prev_history',
+    'prev_pips', 'prev_stacks', 'prev_pot', 'prev_street', 'prev_active', 'prev_terminal',
+    'prev_winner', 'prev_payoffs',
+])
+
+
+# Legal action tuples, shared by every GameState
+_DISCARD_ACTIONS = (ACTION_DISCARD_0, ACTION_DISCARD_1, ACTION_DISCARD_2)
+_FOLD_ONLY = (ACTION_FOLD,)
+_FOLD_CALL = (ACTION_FOLD, ACTION_CHECK_CALL)
+_CHECK_ONLY = (ACTION_CHECK_CALL,)
+# By bet tier: how many of the 33%, 66% and pot-sized bets the chips behind cover.
+# All-in is offered unless the pot-sized bet is, or always when nobody has bet.
+_FACING_BET_ACTIONS = (
+    _FOLD_CALL + (ACTION_ALL_IN,),
+    _FOLD_CALL + (ACTION_BET_33, ACTION_ALL_IN),
+    _FOLD_CALL + (ACTION_BET_33, ACTION_BET_66, ACTION_ALL_IN),
+    _FOLD_CALL + (ACTION_BET_33, ACTION_BET_66, ACTION_BET_POT),
+)
+_OPEN_ACTIONS = (
+    _CHECK_ONLY + (ACTION_ALL_IN,),
+    _CHECK_ONLY + (ACTION_BET_33, ACTION_ALL_IN),
+    _CHECK_ONLY + (ACTION_BET_33, ACTION_BET_66, ACTION_ALL_IN),
+    _CHECK_ONLY + (ACTION_BET_33, ACTION_BET_66, ACTION_BET_POT, ACTION_ALL_IN),
+)
+
+
+def _bet_tier(chips, pot):
+    """Number of the 33%, 66% and pot-sized bets that chips can cover."""
+    chips *= 100
+    return (chips >= pot * 33) + (chips >= pot * 66) + (chips >= pot * 100)
+
 
 class GameState:
     """
     Represents a simplified poker game state for MCCFR training.
     """
     
+    # Fixed fields: no per-instance __dict__, and attribute access goes through slots
+    __slots__ = (
+        'deck', 'hole_cards', 'board', 'discarded_cards', 'stacks', 'pips', 'pot',
+        'street', 'active_player', 'button', 'betting_history', '_card_keys',
+        'is_terminal', 'winner', 'payoffs',
+    )
+    
     def __init__(self):
         """Initialize a new hand."""
-        # Initialize deck
-        self.deck = [rank + suit for rank in RANKS for suit in SUITS]
-        random.shuffle(self.deck)
+        # Draw only the cards a hand can deal, in random order, instead of
+        # building and shuffling all 52
+        self.deck = random.sample(FULL_DECK, CARDS_DEALT)
         
         # Deal initial cards
         self.hole_cards = [
@@ -70,7 +120,8 @@ class GameState:
         self.button = 0  # Small blind position
         
         # History
-        self.betting_history = [[]]  # List of action codes per street
+        self.betting_history = [0]  # Each street's action codes, packed with append_history
+        self._card_keys = [None, None]  # Each player's infoset key without the history
         self.is_terminal = False
         self.winner = None
         self.payoffs = [0, 0]
@@ -79,76 +130,119 @@ class GameState:
         self.board = [self.deck.pop() for _ in range(2)]
     
     def copy(self):
-        """Create a deep copy of this state."""
-        return deepcopy(self)
+        """
+        Create an independent copy of this state.
+        
+        Clones the lists field by field; every other field is an immutable
+        scalar, so sharing it is safe and far cheaper than deepcopy.
+        """
+        new = GameState.__new__(GameState)
+        new.deck = self.deck[:]
+        new.hole_cards = [self.hole_cards[0][:], self.hole_cards[1][:]]
+        new.board = self.board[:]
+        new.discarded_cards = self.discarded_cards[:]
+        new.stacks = self.stacks[:]
+        new.pips = self.pips[:]
+        new.pot = self.pot
+        new.street = self.street
+        new.active_player = self.active_player
+        new.button = self.button
+        new.betting_history = self.betting_history[:]
+        new._card_keys = self._card_keys[:]
+        new.is_terminal = self.is_terminal
+        new.winner = self.winner
+        new.payoffs = self.payoffs[:]
+        return new
     
     def get_legal_actions(self):
         """
-        Return list of legal action codes for the active player.
+        Return a tuple of legal action codes for the active player.
+        
+        The tuples are shared module constants, so callers must not modify them.
         """
         if self.is_terminal:
-            return []
+            return ()
+        
+        player = self.active_player
         
         # Discard phase
-        if self.street in [2, 3]:
-            if len(self.hole_cards[self.active_player]) == 3:
-                return [ACTION_DISCARD_0, ACTION_DISCARD_1, ACTION_DISCARD_2]
+        if self.street in (2, 3):
+            if len(self.hole_cards[player]) == 3:
+                return _DISCARD_ACTIONS
             else:
                 # Already discarded, just pass turn
-                return []
+                return ()
         
         # Betting phase
-        facing_bet = self.pips[1 - self.active_player] > self.pips[self.active_player]
-        amount_to_call = self.pips[1 - self.active_player] - self.pips[self.active_player]
+        stack = self.stacks[player]
+        amount_to_call = self.pips[1 - player] - self.pips[player]
         
-        actions = []
+        if amount_to_call > 0:
+            # Facing a bet: fold, call, or raise if we have chips left after calling
+            if amount_to_call > stack:
+                return _FOLD_ONLY
+            if stack == amount_to_call:
+                return _FOLD_CALL
+            remaining = stack - amount_to_call
+            current_pot = self.pot + amount_to_call
+            return _FACING_BET_ACTIONS[_bet_tier(remaining, current_pot)]
         
-        if facing_bet:
-            # Can fold, call, or raise
-            actions.append(ACTION_FOLD)
-            if amount_to_call <= self.stacks[self.active_player]:
-                actions.append(ACTION_CHECK_CALL)
-            
-            # Can raise if we have chips left after calling
-            if self.stacks[self.active_player] > amount_to_call:
-                remaining = self.stacks[self.active_player] - amount_to_call
-                current_pot = self.pot + amount_to_call
-                
-                # Add raise options based on remaining stack
-                if remaining >= current_pot * 0.33:
-                    actions.append(ACTION_BET_33)
-                if remaining >= current_pot * 0.66:
-                    actions.append(ACTION_BET_66)
-                if remaining >= current_pot:
-                    actions.append(ACTION_BET_POT)
-                if remaining < current_pot or remaining == self.stacks[self.active_player]:
-                    actions.append(ACTION_ALL_IN)
-        else:
-            # Can check or bet
-            actions.append(ACTION_CHECK_CALL)
-            
-            # Can bet if we have chips
-            if self.stacks[self.active_player] > 0:
-                current_pot = self.pot
-                stack = self.stacks[self.active_player]
-                
-                if stack >= current_pot * 0.33:
-                    actions.append(ACTION_BET_33)
-                if stack >= current_pot * 0.66:
-                    actions.append(ACTION_BET_66)
-                if stack >= current_pot:
-                    actions.append(ACTION_BET_POT)
-                actions.append(ACTION_ALL_IN)
+        # Can check, or bet if we have chips
+        if stack > 0:
+            return _OPEN_ACTIONS[_bet_tier(stack, self.pot)]
+        return _CHECK_ONLY
+    
+    def _undo_record(self, action):
+        """Snapshot everything apply_action or _advance_street may change."""
+        player = self.active_player
+        return Undo(action, player, len(self.hole_cards[player]), self.discarded_cards[player],
+                    len(self.deck), len(self.betting_history), self.betting_history[-1],
+                    tuple(self.pips), tuple(self.stacks), self.pot, self.street, player,
+                    self.is_terminal, self.winner, tuple(self.payoffs))
+    
+    def undo(self, record):
+        """
+        Reverse the apply_action call that returned record.
+        
+        Records must be undone in the reverse order they were made.
+        """
+        board = self.board
+        hole = self.hole_cards[record.player]
+        if (len(self.deck) < record.deck_len or len(hole) < record.hole_len
+                or self.street != record.prev_street):
+            self._card_keys = [None, None]
+        # Cards dealt since the record go back on the deck, newest first
+        while len(self.deck) < record.deck_len:
+            self.deck.append(board.pop())
+        if len(hole) < record.hole_len:
+            # The discard was appended to the board before any deal
+            hole.insert(record.action - ACTION_DISCARD_0, board.pop())
+        self.discarded_cards[record.player] = record.prev_discarded
+        
+        del self.betting_history[record.num_streets:]
+        self.betting_history[-1] = record.prev_history
         
-        return actions
+        self.pips[:] = record.prev_pips
+        self.stacks[:] = record.prev_stacks
+        self.pot = record.prev_pot
+        self.street = record.prev_street
+        self.active_player = record.prev_active
+        self.is_terminal = record.prev_terminal
+        self.winner = record.prev_winner
+        self.payoffs[:] = record.prev_payoffs
     
     def apply_action(self, action):
         """
         Apply an action and transition to next state.
-        Modifies state in-place.
+        Modifies state in-place, stopping at the next node with a legal action.
+        
+        Returns:
+            Undo record for GameState.undo, so a search can step back
+            instead of copying the state
         """
+        record = self._undo_record(action)
         if self.is_terminal:
-            return
+            return record
         
         player = self.active_player
         
@@ -157,30 +251,32 @@ class GameState:
             discard_idx = action - ACTION_DISCARD_0
             if discard_idx < len(self.hole_cards[player]):
                 discarded = self.hole_cards[player].pop(discard_idx)
+                self._card_keys = [None, None]
                 self.discarded_cards[player] = discarded
                 self.board.append(discarded)
             
             # Add to history
-            self.betting_history[-1].append(str(action))
+            self.betting_history[-1] = append_history(self.betting_history[-1], str(action))
             
             # Check if both players have discarded
             if self.discarded_cards[0] is not None and self.discarded_cards[1] is not None:
                 # Move to next street
                 self._advance_street()
+                self._skip_empty_streets()
             else:
                 # Switch to other player
                 self.active_player = 1 - self.active_player
             
-            return
+            return record
         
         # Handle betting actions
         if action == ACTION_FOLD:
-            # Opponent wins
+            # Opponent wins what the folder put in
             self.is_terminal = True
             self.winner = 1 - player
-            chips_won = self.pot + self.pips[player]
-            self.payoffs[self.winner] = chips_won - STARTING_STACK
-            self.payoffs[player] = -(chips_won - STARTING_STACK)
+            lost = STARTING_STACK - self.stacks[player]
+            self.payoffs[self.winner] = lost
+            self.payoffs[player] = -lost
             
         elif action == ACTION_CHECK_CALL:
             amount_to_call = self.pips[1 - player] - self.pips[player]
@@ -198,18 +294,11 @@ class GameState:
                 self.active_player = 1 - self.active_player
         
         else:
-            # Betting actions
-            current_pot = self.pot
-            bet_size = 0
-            
-            if action == ACTION_BET_33:
-                bet_size = int(current_pot * 0.33)
-            elif action == ACTION_BET_66:
-                bet_size = int(current_pot * 0.66)
-            elif action == ACTION_BET_POT:
-                bet_size = current_pot
-            elif action == ACTION_ALL_IN:
+            # Betting actions, sized in integer percent of the pot
+            if action == ACTION_ALL_IN:
                 bet_size = self.stacks[player]
+            else:
+                bet_size = self.pot * BET_PERCENT.get(action, 0) // 100
             
             # Ensure we don't bet more than our stack
             bet_size = min(bet_size, self.stacks[player])
@@ -226,7 +315,14 @@ class GameState:
             self.active_player = 1 - self.active_player
         
         # Add to history
-        self.betting_history[-1].append(str(action))
+        self.betting_history[-1] = append_history(self.betting_history[-1], str(action))
+        self._skip_empty_streets()
+        return record
+    
+    def _skip_empty_streets(self):
+        """Advance past streets where the active player has nothing to do (the post-discard street)."""
+        while not self.is_terminal and not self.get_legal_actions():
+            self._advance_street()
     
     def _advance_street(self):
         """Move to the next betting street."""
@@ -259,49 +355,54 @@ class GameState:
             return
         
         # Start new betting round
-        self.betting_history.append([])
+        self.betting_history.append(0)
+        self._card_keys = [None, None]
     
     def _evaluate_showdown(self):
         """Evaluate hands at showdown and determine winner."""
         self.is_terminal = True
         
-        # Build each player's available cards (hole + board + own discard)
-        cards0 = self.hole_cards[0] + self.board
-        cards1 = self.hole_cards[1] + self.board
+        # Build each player's available cards (hole + board + own discard).
+        # Scores order by category first, so comparing them already settles
+        # most showdowns on the category alone.
+        score0 = evaluate_hand(tuple(self.hole_cards[0] + self.board))
+        score1 = evaluate_hand(tuple(self.hole_cards[1] + self.board))
         
-        result = compare_hands(cards0, cards1)
-        
-        if result > 0:
+        if score0 > score1:
             self.winner = 0
-        elif result < 0:
+        elif score0 < score1:
             self.winner = 1
         else:
             # Tie - split pot
             self.payoffs = [0, 0]
             return
         
-        # Winner gets the pot
+        # Winner takes what the loser put in
         loser = 1 - self.winner
-        self.payoffs[self.winner] = (STARTING_STACK - self.stacks[self.winner]) - STARTING_STACK
-        self.payoffs[loser] = (STARTING_STACK - self.stacks[loser]) - STARTING_STACK
+        contributed_loser = STARTING_STACK - self.stacks[loser]
+        self.payoffs[self.winner] = contributed_loser
+        self.payoffs[loser] = -contributed_loser
     
     def get_infoset_key(self, player):
         """
         Get the information set key for the given player.
         This only includes information visible to that player.
         """
-        position = (player == self.button)
-        
-        return get_infoset_key(
-            player_id=player,
-            hole_cards=self.hole_cards[player],
-            board_cards=self.board,
-            discarded_by_us=self.discarded_cards[player],
-            discarded_by_opp=self.discarded_cards[1 - player],
-            street=self.street,
-            betting_history=self.betting_history[-1] if self.betting_history else [],
-            position=position
-        )
+        # The card part only changes on a discard or a new street, so it is kept
+        # between calls and the packed history is added on top
+        card_key = self._card_keys[player]
+        if card_key is None:
+            card_key = self._card_keys[player] = get_infoset_key(
+                player_id=player,
+                hole_cards=self.hole_cards[player],
+                board_cards=self.board,
+                discarded_by_us=self.discarded_cards[player],
+                discarded_by_opp=self.discarded_cards[1 - player],
+                street=self.street,
+                betting_history=0,
+                position=(player == self.button)
+            )
+        return card_key | (self.betting_history[-1] << HISTORY_SHIFT)
     
     def is_chance_node(self):
         """Returns True if this is a chance node (card dealing)."""
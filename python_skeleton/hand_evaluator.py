@@ -3,8 +3,11 @@ Fast hand evaluator for 7-card poker hands.
 Uses a simplified approach suitable for Monte Carlo simulations.
 '''
 
-from itertools import combinations
+import os
+import pickle
+from itertools import combinations, combinations_with_replacement
 from functools import lru_cache
+from math import prod
 
 
 # Card representation: "2h" = 2 of hearts, "As" = Ace of spades
@@ -13,6 +16,11 @@ SUITS = "cdhs"  # clubs, diamonds, hearts, spades
 
 RANK_VALUES = {rank: i for i, rank in enumerate(RANKS)}
 
+# Cactus-Kev style encoding: each rank maps to a prime, so the product of a hand's
+# primes identifies its rank multiset regardless of card order
+RANK_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+CARD_PRIMES = {rank + suit: RANK_PRIMES[i] for i, rank in enumerate(RANKS) for suit in SUITS}
+
 
 @lru_cache(maxsize=100000)
 def evaluate_hand(cards_tuple):
@@ -25,19 +33,87 @@ def evaluate_hand(cards_tuple):
     Returns:
         Integer score where higher is better
     """
-    cards = list(cards_tuple)
+    return _evaluate(cards_tuple)
+
+
+def evaluate_hands(hands):
+    """
+    Evaluate many hands at once, e.g. every rollout of a Monte Carlo batch.
+    
+    Skips the evaluate_hand cache, since random rollouts rarely repeat and
+    would only evict useful entries.
+    
+    Args:
+        hands: Iterable of card sequences
     
-    if len(cards) < 5:
+    Returns:
+        List of integer scores, one per hand
+    """
+    return [_evaluate(hand) for hand in hands]
+
+
+def _evaluate(cards_tuple):
+    """Uncached evaluate_hand."""
+    if len(cards_tuple) < 5:
         return 0  # Invalid hand
     
-    best_score = 0
+    primes = [CARD_PRIMES[card] for card in cards_tuple]
+    suits = [card[1] for card in cards_tuple]
     
-    # Try all 5-card combinations
-    for hand in combinations(cards, 5):
-        score = evaluate_5card_hand(hand)
-        if score > best_score:
-            best_score = score
+    # Scoring every subset as unsuited never overrates a flush, which the flush
+    # scores below then cover
+    best_score = _best_unsuited_hand(primes)
+    for suit in SUITS:
+        if suits.count(suit) >= 5:
+            best_score = max(best_score, _best_flush([p for p, s in zip(primes, suits) if s == suit]))
+    return best_score
+
+
+def _best_unsuited_hand(primes):
+    """
+    Best non-flush score over all 5-card subsets, memoized by the rank multiset.
+    """
+    key = prod(primes)
+    best_score = _BEST_UNSUITED.get(key)
+    if best_score is None:
+        best_score = max(_UNSUITED_SCORES[p0 * p1 * p2 * p3 * p4]
+                         for p0, p1, p2, p3, p4 in combinations(primes, 5))
+        _BEST_UNSUITED[key] = best_score
+    return best_score
+
+
+def _best_flush(primes):
+    """
+    Best flush or straight flush score over 5-card subsets of one suit's cards,
+    memoized by their prime product.
+    """
+    key = prod(primes)
+    best_score = _BEST_FLUSH.get(key)
+    if best_score is None:
+        best_score = max(_FLUSH_SCORES[p0 * p1 * p2 * p3 * p4]
+                         for p0, p1, p2, p3, p4 in combinations(primes, 5))
+        _BEST_FLUSH[key] = best_score
+    return best_score
+
+
+def drop_one_evaluate(product, prime_to_drop):
+    """
+    Best non-flush score of a hand given by its prime product, with one card removed.
     
+    Lets callers evaluate several "all cards but one" hands from a single product
+    instead of rebuilding each card list. The caller must rule out flushes.
+    """
+    key = product // prime_to_drop
+    best_score = _BEST_UNSUITED.get(key)
+    if best_score is None:
+        # Recover the rank multiset by factoring out the rank primes
+        primes = []
+        remaining = key
+        for prime in RANK_PRIMES:
+            while remaining % prime == 0:
+                primes.append(prime)
+                remaining //= prime
+        best_score = _best_unsuited_hand(primes)
     return best_score
 
 
@@ -56,24 +132,57 @@ def evaluate_5card_hand(hand):
     - One Pair: 1 * 10^6 + pair_rank * 2197 + kicker1 * 169 + kicker2 * 13 + kicker3
     - High Card: card values
     """
-    ranks = [RANK_VALUES[card[0]] for card in hand]
-    suits = [card[1] for card in hand]
+    a, b, c, d, e = [RANK_VALUES[card[0]] for card in hand]
     
-    ranks.sort(reverse=True)
+    # Sort the ranks high to low with the optimal 9-comparator network for 5 inputs
+    if a < b:
+        a, b = b, a
+    if d < e:
+        d, e = e, d
+    if c < e:
+        c, e = e, c
+    if c < d:
+        c, d = d, c
+    if a < d:
+        a, d = d, a
+    if a < c:
+        a, c = c, a
+    if b < e:
+        b, e = e, b
+    if b < d:
+        b, d = d, b
+    if b < c:
+        b, c = c, b
+    ranks = (a, b, c, d, e)
+    
+    # Rank frequencies, then the two largest groups (higher rank first on equal counts)
+    rank_counts = [0] * 13
+    for rank in ranks:
+        rank_counts[rank] += 1
+    top_count = second_count = 0
+    top_rank = second_rank = 0
+    for rank in range(12, -1, -1):
+        count = rank_counts[rank]
+        if count > top_count:
+            second_count, second_rank = top_count, top_rank
+            top_count, top_rank = count, rank
+        elif count > second_count:
+            second_count, second_rank = count, rank
     
     # Check for flush
-    is_flush = len(set(suits)) == 1
+    suit = hand[0][1]
+    is_flush = hand[1][1] == suit and hand[2][1] == suit and hand[3][1] == suit and hand[4][1] == suit
     
     # Check for straight
     is_straight = False
     straight_high = 0
     
     # Normal straight
-    if ranks[0] - ranks[4] == 4 and len(set(ranks)) == 5:
+    if a - e == 4 and top_count == 1:
         is_straight = True
-        straight_high = ranks[0]
+        straight_high = a
     # Wheel (A-2-3-4-5)
-    elif ranks == [12, 3, 2, 1, 0]:  # A-5-4-3-2
+    elif ranks == (12, 3, 2, 1, 0):  # A-5-4-3-2
         is_straight = True
         straight_high = 3  # 5-high straight
     
@@ -81,45 +190,95 @@ def evaluate_5card_hand(hand):
     if is_straight and is_flush:
         return 8_000_000 + straight_high
     
-    # Count rank frequencies
-    rank_counts = {}
-    for rank in ranks:
-        rank_counts[rank] = rank_counts.get(rank, 0) + 1
-    
-    counts = sorted(rank_counts.items(), key=lambda x: (x[1], x[0]), reverse=True)
-    
     # Four of a Kind
-    if counts[0][1] == 4:
-        return 7_000_000 + counts[0][0] * 13 + counts[1][0]
+    if top_count == 4:
+        return 7_000_000 + top_rank * 13 + second_rank
     
     # Full House
-    if counts[0][1] == 3 and counts[1][1] == 2:
-        return 6_000_000 + counts[0][0] * 13 + counts[1][0]
+    if top_count == 3 and second_count == 2:
+        return 6_000_000 + top_rank * 13 + second_rank
     
     # Flush
     if is_flush:
-        return 5_000_000 + ranks[0] * 28561 + ranks[1] * 2197 + ranks[2] * 169 + ranks[3] * 13 + ranks[4]
+        return 5_000_000 + a * 28561 + b * 2197 + c * 169 + d * 13 + e
     
     # Straight
     if is_straight:
         return 4_000_000 + straight_high
     
     # Three of a Kind
-    if counts[0][1] == 3:
-        kickers = sorted([c[0] for c in counts[1:]], reverse=True)
-        return 3_000_000 + counts[0][0] * 169 + kickers[0] * 13 + kickers[1]
+    if top_count == 3:
+        kicker1, kicker2 = [rank for rank in ranks if rank != top_rank]
+        return 3_000_000 + top_rank * 169 + kicker1 * 13 + kicker2
     
     # Two Pair
-    if counts[0][1] == 2 and counts[1][1] == 2:
-        return 2_000_000 + counts[0][0] * 169 + counts[1][0] * 13 + counts[2][0]
+    if top_count == 2 and second_count == 2:
+        kicker = [rank for rank in ranks if rank != top_rank and rank != second_rank][0]
+        return 2_000_000 + top_rank * 169 + second_rank * 13 + kicker
     
     # One Pair
-    if counts[0][1] == 2:
-        kickers = sorted([c[0] for c in counts[1:]], reverse=True)
-        return 1_000_000 + counts[0][0] * 2197 + kickers[0] * 169 + kickers[1] * 13 + kickers[2]
+    if top_count == 2:
+        kicker1, kicker2, kicker3 = [rank for rank in ranks if rank != top_rank]
+        return 1_000_000 + top_rank * 2197 + kicker1 * 169 + kicker2 * 13 + kicker3
     
     # High Card
-    return ranks[0] * 28561 + ranks[1] * 2197 + ranks[2] * 169 + ranks[3] * 13 + ranks[4]
+    return a * 28561 + b * 2197 + c * 169 + d * 13 + e
+
+
+def _build_score_tables():
+    """
+    Score every 5-card rank multiset once, as a flush and as a non-flush,
+    keyed by prime product.
+    """
+    unsuited_scores = {}
+    flush_scores = {}
+    for ranks in combinations_with_replacement(range(len(RANKS)), 5):
+        product = prod(RANK_PRIMES[r] for r in ranks)
+        unsuited_scores[product] = evaluate_5card_hand([RANKS[r] + suit for r, suit in zip(ranks, "cdhsc")])
+        flush_scores[product] = evaluate_5card_hand([RANKS[r] + "s" for r in ranks])
+    return unsuited_scores, flush_scores
+
+
+_UNSUITED_SCORES, _FLUSH_SCORES = _build_score_tables()
+_BEST_UNSUITED = {}  # prime product of all cards -> best non-flush score
+_BEST_FLUSH = {}  # prime product of one suit's cards -> best flush score
+
+
+def warmup(max_cards=7):
+    """
+    Precompute the best non-flush score of every rank multiset of 5 to max_cards
+    cards that one deck can deal (at most 4 of a rank).
+    """
+    for num_cards in range(5, max_cards + 1):
+        for ranks in combinations_with_replacement(range(len(RANKS)), num_cards):
+            if max(ranks.count(rank) for rank in set(ranks)) <= 4:
+                _best_unsuited_hand([RANK_PRIMES[rank] for rank in ranks])
+
+
+def save_evaluation_cache(filepath):
+    """
+    Save the memoized non-flush scores so later runs can skip recomputing them.
+    
+    Args:
+        filepath: Path to save the cache
+    """
+    with open(filepath, 'wb') as f:
+        pickle.dump(_BEST_UNSUITED, f)
+
+
+def load_evaluation_cache(filepath):
+    """
+    Load scores saved by save_evaluation_cache, if the file exists.
+    
+    Returns:
+        Number of cached hands loaded
+    """
+    if not os.path.exists(filepath):
+        return 0
+    with open(filepath, 'rb') as f:
+        cached = pickle.load(f)
+    _BEST_UNSUITED.update(cached)
+    return len(cached)
 
 
 def get_hand_strength_category(cards):
@@ -140,26 +299,8 @@ def get_hand_strength_category(cards):
     if not cards or len(cards) < 5:
         return 0
     
-    score = evaluate_hand(tuple(cards))
-    
-    if score >= 8_000_000:
-        return 8
-    elif score >= 7_000_000:
-        return 7
-    elif score >= 6_000_000:
-        return 6
-    elif score >= 5_000_000:
-        return 5
-    elif score >= 4_000_000:
-        return 4
-    elif score >= 3_000_000:
-        return 3
-    elif score >= 2_000_000:
-        return 2
-    elif score >= 1_000_000:
-        return 1
-    else:
-        return 0
+    # Each category's scores start at category * 10^6; straight flushes stay below 9 * 10^6
+    return evaluate_hand(tuple(cards)) // 1_000_000
 
 
 def compare_hands(cards1, cards2):
@@ -177,38 +318,124 @@ def compare_hands(cards1, cards2):
         return 0
 
 
-def get_hand_percentile(cards):
+# Rough percentile of each hand category, high card to straight flush; pairs are
+# spread out by score in evaluate_full
+_CATEGORY_PERCENTILES = (2, None, 35, 55, 70, 82, 92, 97, 99)
+
+
+def evaluate_full(cards):
     """
-    Returns a rough percentile (0-100) of hand strength.
-    Useful for bucketing.
+    Score, strength category and rough percentile of a hand from one evaluation.
+    
+    Returns:
+        (score, category, percentile), all 0 for fewer than 5 cards
     """
     if not cards or len(cards) < 5:
-        return 0
+        return 0, 0, 0
     
     score = evaluate_hand(tuple(cards))
-    category = get_hand_strength_category(cards)
-    
-    # Rough percentile mapping based on hand category
-    if category == 8:  # Straight Flush
-        return 99
-    elif category == 7:  # Quads
-        return 97
-    elif category == 6:  # Full House
-        return 92
-    elif category == 5:  # Flush
-        return 82
-    elif category == 4:  # Straight
-        return 70
-    elif category == 3:  # Trips
-        return 55
-    elif category == 2:  # Two Pair
-        return 35
-    elif category == 1:  # Pair
+    category = score // 1_000_000
+    if category == 1:
         # Within pair, differentiate by score
-        pair_strength = (score - 1_000_000) / 2_000_000 * 100
-        return min(20, max(5, pair_strength))
-    else:  # High Card
-        return 2
+        percentile = min(20, max(5, (score - 1_000_000) / 2_000_000 * 100))
+    else:
+        percentile = _CATEGORY_PERCENTILES[category]
+    return score, category, percentile
+
+
+def _preflop_index(card1, card2):
+    """Index of a two-card starting hand in _PREFLOP_169: suited above the diagonal, offsuit below."""
+    high, low = RANK_VALUES[card1[0]], RANK_VALUES[card2[0]]
+    if high < low:
+        high, low = low, high
+    if card1[1] == card2[1]:
+        return low * 13 + high
+    return high * 13 + low
+
+
+def compute_preflop_percentiles(num_samples=20000, seed=None):
+    """
+    Regenerate _PREFLOP_169: Monte Carlo equity of each starting hand against a
+    random two-card hand on a six-card board, turned into the percentile of all
+    1326 two-card combos that it beats (ties count half).
+    
+    Returns:
+        Tuple of 169 integer percentiles indexed by _preflop_index
+    """
+    import random
+    
+    rng = random.Random(seed)
+    deck = [rank + suit for rank in RANKS for suit in SUITS]
+    equity = [0.0] * 169
+    combos = [0] * 169
+    for hand in combinations(deck, 2):
+        combos[_preflop_index(*hand)] += 1
+    for idx in range(169):
+        high, low = max(idx // 13, idx % 13), min(idx // 13, idx % 13)
+        suits = ("c", "c") if low * 13 + high == idx and high != low else ("c", "d")
+        mine = [RANKS[high] + suits[0], RANKS[low] + suits[1]]
+        rest = [card for card in deck if card not in mine]
+        won = 0.0
+        for _ in range(num_samples):
+            drawn = rng.sample(rest, 8)
+            board = drawn[2:]
+            my_score = evaluate_hand(tuple(mine + board))
+            opp_score = evaluate_hand(tuple(drawn[:2] + board))
+            won += 1.0 if my_score > opp_score else 0.5 if my_score == opp_score else 0.0
+        equity[idx] = won / num_samples
+    
+    total = sum(combos)
+    percentiles = []
+    for idx in range(169):
+        below = sum(n for e, n in zip(equity, combos) if e < equity[idx])
+        below += sum(n for e, n in zip(equity, combos) if e == equity[idx]) / 2
+        percentiles.append(round(100 * below / total))
+    return tuple(percentiles)
+
+
+# Percentile of each two-card starting hand among all 1326 combos, from
+# compute_preflop_percentiles() with the defaults and seed=2026
+_PREFLOP_169 = (
+    26, 7, 12, 16, 13, 11, 20, 23, 35, 39, 50, 61, 75,
+    0, 42, 19, 23, 22, 19, 23, 29, 44, 48, 57, 66, 81,
+    1, 6, 55, 33, 31, 30, 35, 30, 43, 51, 59, 68, 83,
+    4, 11, 17, 71, 36, 38, 41, 42, 47, 55, 65, 74, 88,
+    3, 9, 12, 24, 84, 46, 51, 53, 54, 59, 68, 79, 85,
+    2, 7, 13, 20, 33, 94, 57, 55, 61, 64, 68, 81, 88,
+    5, 8, 16, 22, 34, 37, 96, 64, 71, 71, 73, 82, 91,
+    10, 14, 18, 27, 32, 44, 49, 98, 74, 79, 84, 87, 91,
+    15, 21, 26, 29, 40, 47, 58, 62, 98, 88, 90, 92, 96,
+    25, 28, 31, 41, 38, 48, 59, 67, 75, 98, 90, 94, 96,
+    36, 39, 43, 52, 53, 54, 62, 73, 78, 82, 99, 95, 97,
+    45, 50, 56, 60, 65, 70, 69, 79, 86, 87, 89, 99, 97,
+    63, 66, 72, 77, 76, 80, 83, 85, 90, 93, 92, 95, 100,
+)
+
+
+def get_preflop_percentile(card1, card2):
+    """
+    Returns the percentile (0-100) of a two-card starting hand among all 1326 combos.
+    """
+    return _PREFLOP_169[_preflop_index(card1, card2)]
+
+
+def get_hand_percentile(cards):
+    """
+    Returns a rough percentile (0-100) of hand strength.
+    Useful for bucketing.
+    """
+    return evaluate_full(cards)[2]
+
+
+# Prefer the compiled scorers from hand_evaluator_c.pyx when setup.py has built them.
+# The score tables above are already built, so only callers see the compiled versions.
+try:
+    import hand_evaluator_c
+    evaluate_hand = lru_cache(maxsize=100000)(hand_evaluator_c.evaluate)
+    evaluate_hands = hand_evaluator_c.evaluate_hands
+    evaluate_5card_hand = hand_evaluator_c.evaluate_5card_hand
+except ImportError:
+    pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+# Shared with bucketing_c.pyx and equity_c.pyx, which cimport the card tables (and equity_c the scorer)
+
+cdef enum:
+    MAX_CARDS = 52
+    MAX_HAND = 16  # more than any hand plus a 6-card board
+
+# rank value (0-12) by character code, -1 for anything that isn't a rank
+cdef int RANK[128]
+# suit index (0-3) by character code
+cdef int SUIT[128]
+
+cdef long score(int* ranks, int* suits, int n)
@@ -0,0 +1,175 @@
+# cython: language_level=3
+'''
+Compiled hand scoring for hand_evaluator.py.
+
+Hands are scored straight from rank and suit counts, giving the same scores as
+hand_evaluator.evaluate_hand. setup.py builds this module, and hand_evaluator.py
+keeps its pure-Python evaluator when it has not been built; bucketing_c.pyx and
+equity_c.pyx cimport the tables and score() declared in hand_evaluator_c.pxd.
+'''
+
+cdef int _i
+for _i in range(128):
+    RANK[_i] = -1
+    SUIT[_i] = 0
+for _i, _c in enumerate('23456789TJQKA'):
+    RANK[ord(_c)] = _i
+for _i, _c in enumerate('cdhs'):
+    SUIT[ord(_c)] = _i
+
+
+cdef inline int _straight_high(int mask):
+    '''
+    High rank of the best straight in a 13-bit rank mask, 3 for the wheel, -1 if none.
+    '''
+    # Bit i of runs is set when ranks i..i+4 are all present
+    cdef int runs = mask & (mask >> 1) & (mask >> 2) & (mask >> 3) & (mask >> 4)
+    cdef int high = 4
+    if runs:
+        while runs > 1:
+            runs >>= 1
+            high += 1
+        return high
+    if mask & 0x100F == 0x100F:
+        return 3
+    return -1
+
+
+cdef inline int _top_ranks(int mask, int count, int skip0, int skip1):
+    '''
+    The highest `count` ranks in mask, excluding skip0 and skip1, weighted
+    base 13 from the highest down as evaluate_5card_hand does.
+    '''
+    cdef int rank, total = 0
+    for rank in range(12, -1, -1):
+        if count == 0:
+            break
+        if (mask >> rank) & 1 and rank != skip0 and rank != skip1:
+            total = total * 13 + rank
+            count -= 1
+    return total
+
+
+cdef long _flush_score(int* ranks, int* suits, int n, int suit, int suit_mask):
+    '''
+    Best straight flush or flush score of the cards of one suit.
+    '''
+    cdef int suited_counts[13]
+    cdef int i, rank, total = 0, remaining = 5
+    cdef int high = _straight_high(suit_mask)
+    if high >= 0:
+        return 8_000_000 + high
+    # Top five suited cards, counting a card passed twice twice as the
+    # prime-product evaluator does
+    for i in range(13):
+        suited_counts[i] = 0
+    for i in range(n):
+        if suits[i] == suit:
+            suited_counts[ranks[i]] += 1
+    for rank in range(12, -1, -1):
+        while suited_counts[rank] and remaining:
+            total = total * 13 + rank
+            suited_counts[rank] -= 1
+            remaining -= 1
+    return 5_000_000 + total
+
+
+cdef long score(int* ranks, int* suits, int n):
+    '''
+    Best 5-card score of n cards, as hand_evaluator.evaluate_hand.
+    '''
+    cdef int rank_counts[13]
+    cdef int suit_counts[4]
+    cdef int suit_masks[4]
+    cdef int i, rank, rank_mask = 0, high
+    cdef int quads = -1, trips = -1, pair = -1, second_pair = -1
+    cdef long flush = 0
+    if n < 5:
+        return 0
+
+    for i in range(13):
+        rank_counts[i] = 0
+    for i in range(4):
+        suit_counts[i] = 0
+        suit_masks[i] = 0
+    for i in range(n):
+        rank_counts[ranks[i]] += 1
+        suit_counts[suits[i]] += 1
+        suit_masks[suits[i]] |= 1 << ranks[i]
+        rank_mask |= 1 << ranks[i]
+    for i in range(4):
+        if suit_counts[i] >= 5:
+            flush = max(flush, _flush_score(ranks, suits, n, i, suit_masks[i]))
+    if flush >= 8_000_000:
+        return flush
+
+    for rank in range(12, -1, -1):
+        if rank_counts[rank] >= 4 and quads < 0:
+            quads = rank
+        elif rank_counts[rank] >= 3 and trips < 0:
+            trips = rank
+        elif rank_counts[rank] >= 2:
+            if pair < 0:
+                pair = rank
+            elif second_pair < 0:
+                second_pair = rank
+
+    if quads >= 0:
+        return 7_000_000 + quads * 13 + _top_ranks(rank_mask, 1, quads, -1)
+    if trips >= 0:
+        # a lower set of trips also fills the full house
+        for rank in range(12, -1, -1):
+            if rank != trips and rank_counts[rank] >= 2:
+                return 6_000_000 + trips * 13 + rank
+    if flush:
+        return flush
+    high = _straight_high(rank_mask)
+    if high >= 0:
+        return 4_000_000 + high
+    if trips >= 0:
+        return 3_000_000 + trips * 169 + _top_ranks(rank_mask, 2, trips, -1)
+    if second_pair >= 0:
+        return 2_000_000 + pair * 169 + second_pair * 13 + _top_ranks(rank_mask, 1, pair, second_pair)
+    if pair >= 0:
+        return 1_000_000 + pair * 2197 + _top_ranks(rank_mask, 3, pair, -1)
+    return _top_ranks(rank_mask, 5, -1, -1)
+
+
+cdef long _score_cards(cards) except -1:
+    '''
+    score() of a sequence of card strings.
+    '''
+    cdef int ranks[MAX_HAND]
+    cdef int suits[MAX_HAND]
+    cdef int n = 0
+    cdef str card
+    for card in cards:
+        if n == MAX_HAND:
+            raise ValueError("too many cards to score")
+        ranks[n] = RANK[ord(card[0])]
+        if ranks[n] < 0:
+            raise KeyError(card)
+        suits[n] = SUIT[ord(card[1])]
+        n += 1
+    return score(ranks, suits, n)
+
+
+def evaluate(cards):
+    '''
+    Score of one hand, as hand_evaluator's uncached evaluate_hand.
+    '''
+    return _score_cards(cards)
+
+
+def evaluate_5card_hand(hand):
+    '''
+    Score of exactly 5 cards, as hand_evaluator.evaluate_5card_hand.
+    '''
+    return _score_cards(hand)
+
+
+def evaluate_hands(hands):
+    '''
+    Scores of many hands at once, as hand_evaluator.evaluate_hands.
+    '''
+    return [_score_cards(hand) for hand in hands]
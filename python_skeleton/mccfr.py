@@ -3,24 +3,73 @@ Monte Carlo Counterfactual Regret Minimization (MCCFR) implementation.
 Uses external sampling for efficient training.
 '''
 
+import gzip
+import os
 import random
 import pickle
+from multiprocessing import Pool
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
-from game_abstraction import GameState, ACTION_NAMES
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, chain, islice
+from game_abstraction import GameState, ACTION_NAMES, NUM_ACTIONS
+from bucketing import infoset_key_to_str, parse_infoset_key
+
+# Probability 1 in strategies saved with save_compact_strategy(quantize=True)
+QUANT_SCALE = 65535
+
+# First bytes of strategy files saved with compress=True; pickles start with b'\x80'
+_GZIP_MAGIC = b'\x1f\x8b'
+
+# Discounted CFR exponents (Brown & Sandholm): positive regrets, negative
+# regrets and the average strategy are scaled by t^a / (t^a + 1), t^b / (t^b + 1)
+# and (t / (t + 1))^g after discount block t
+DCFR_ALPHA = 1.5
+DCFR_BETA = 0.0
+DCFR_GAMMA = 2.0
 
 
 class MCCFRTrainer:
     """
-    MCCFR trainer using external sampling.
+    MCCFR trainer using external or outcome sampling. By default it uses CFR+
+    regret updates (regrets floored at zero) and linear averaging (iteration t
+    adds to the average strategy with weight t).
     """
     
-    def __init__(self):
-        """Initialize trainer with empty strategy tables."""
-        # regret_sum[infoset][action] = cumulative regret
-        self.regret_sum = defaultdict(lambda: defaultdict(float))
+    def __init__(self, sampling="external", exploration=0.6, variant="plus", discount_every=1000):
+        """
+        Initialize trainer with empty strategy tables.
+        
+        Args:
+            sampling: "external" to explore every traverser action each
+                iteration, or "outcome" to follow a single sampled line of play,
+                which makes iterations much cheaper but noisier
+            exploration: With outcome sampling, the weight of the uniform
+                distribution mixed into the traverser's sampling policy
+            variant: "plus" for CFR+, "vanilla" for unfloored regrets and a
+                uniformly weighted average, or "dcfr" for discounted CFR
+            discount_every: With "dcfr", iterations per discount block; the
+                tables are discounted once at the end of each block
+        """
+        if sampling not in ("external", "outcome"):
+            raise ValueError(f"Unknown sampling scheme: {sampling}")
+        if variant not in ("vanilla", "plus", "dcfr"):
+            raise ValueError(f"Unknown CFR variant: {variant}")
+        self.sampling = sampling
+        self.exploration = exploration
+        self.variant = variant
+        self.discount_every = discount_every
+        
+        # Only CFR+ floors regrets at zero and weights the average by iteration
+        self._floor_regrets = variant == "plus"
+        self._average_weight = 1.0
+        
+        # regret_sum[infoset][action] = cumulative regret, one NUM_ACTIONS row per infoset
+        self.regret_sum = defaultdict(_new_row)
         
         # strategy_sum[infoset][action] = cumulative strategy (for averaging)
-        self.strategy_sum = defaultdict(lambda: defaultdict(float))
+        self.strategy_sum = defaultdict(_new_row)
         
         # Current iteration count
         self.iteration = 0
@@ -30,7 +79,7 @@ class MCCFRTrainer:
         Compute current strategy using regret matching.
         
         Args:
-            infoset: Information set key (string)
+            infoset: Information set key (packed int)
             legal_actions: List of legal action codes
         
         Returns:
@@ -38,30 +87,22 @@ class MCCFRTrainer:
         """
         if not legal_actions:
             return {}
-        
-        # Get regrets for this infoset
+        return dict(zip(legal_actions, self._regret_matching(infoset, legal_actions)))
+    
+    def _regret_matching(self, infoset, legal_actions):
+        """get_strategy's probabilities as a list in legal_actions order, without the dict."""
+        # Positive regrets of the legal actions, gathered from the row in one pass
         regrets = self.regret_sum[infoset]
-        
-        # Compute positive regrets
-        positive_regrets = {}
-        total_positive = 0.0
-        
-        for action in legal_actions:
-            regret = max(0.0, regrets[action])
-            positive_regrets[action] = regret
-            total_positive += regret
+        positive_regrets = [regret if regret > 0.0 else 0.0
+                            for regret in [regrets[action] for action in legal_actions]]
+        total_positive = sum(positive_regrets)
         
         # If no positive regrets, use uniform distribution
         if total_positive <= 0:
-            prob = 1.0 / len(legal_actions)
-            return {action: prob for action in legal_actions}
+            return [1.0 / len(legal_actions)] * len(legal_actions)
         
         # Normalize positive regrets to get strategy
-        strategy = {}
-        for action in legal_actions:
-            strategy[action] = positive_regrets[action] / total_positive
-        
-        return strategy
+        return [regret / total_positive for regret in positive_regrets]
     
     def get_average_strategy(self, infoset, legal_actions):
         """
@@ -77,21 +118,16 @@ class MCCFRTrainer:
         if not legal_actions:
             return {}
         
-        strategy_totals = self.strategy_sum[infoset]
-        
-        total = sum(strategy_totals.get(action, 0.0) for action in legal_actions)
+        strategy_totals = self.strategy_sum.get(infoset, _EMPTY_ROW)
+        values = [strategy_totals[action] for action in legal_actions]
+        total = sum(values)
         
         if total <= 0:
             # No data, use uniform
-            prob = 1.0 / len(legal_actions)
-            return {action: prob for action in legal_actions}
+            return dict.fromkeys(legal_actions, 1.0 / len(legal_actions))
         
         # Normalize
-        avg_strategy = {}
-        for action in legal_actions:
-            avg_strategy[action] = strategy_totals[action] / total
-        
-        return avg_strategy
+        return dict(zip(legal_actions, [value / total for value in values]))
     
     def sample_action(self, strategy):
         """
@@ -105,15 +141,11 @@ class MCCFRTrainer:
         """
         if not strategy:
             return None
-        
-        actions = list(strategy.keys())
-        probs = [strategy[a] for a in actions]
-        
-        return random.choices(actions, weights=probs)[0]
+        return list(strategy)[_sample_index(list(strategy.values()))]
     
     def train_iteration(self, traverser):
         """
-        Run one iteration of external sampling MCCFR.
+        Run one iteration of MCCFR with the trainer's sampling scheme.
         
         Args:
             traverser: Player whose regrets we update (0 or 1)
@@ -123,8 +155,17 @@ class MCCFRTrainer:
         """
         # Create a new game
         state = GameState()
+        self._average_weight = self.iteration if self.variant == "plus" else 1.0
         
         # Run CFR from the initial state
+        if self.sampling == "outcome":
+            # Weighting the sampled payoff by the strategies' tail probability
+            # makes it an unbiased estimate of the traverser's expected value
+            value, tail_prob = self._cfr_outcome(state, traverser, 1.0, 1.0)
+            return value * tail_prob
+        if _mccfr_c is not None:
+            return _mccfr_c.cfr_external(self.regret_sum, self.strategy_sum, state, traverser, 1.0, 1.0,
+                                         self._average_weight, self._floor_regrets)
         return self._cfr_external(state, traverser, 1.0, 1.0)
     
     def _cfr_external(self, state, traverser, reach_prob_0, reach_prob_1):
@@ -146,80 +187,143 @@ class MCCFRTrainer:
         
         player = state.active_player
         legal_actions = state.get_legal_actions()
-        
-        if not legal_actions:
-            # No legal actions (shouldn't happen), advance
-            state._advance_street()
-            return self._cfr_external(state, traverser, reach_prob_0, reach_prob_1)
+        # apply_action never stops on a node without a decision
+        assert legal_actions
         
         infoset = state.get_infoset_key(player)
         
-        # Get current strategy
-        strategy = self.get_strategy(infoset, legal_actions)
+        # Get current strategy, as probabilities in legal_actions order
+        strategy = self._regret_matching(infoset, legal_actions)
         
         # If this is the traverser's node, compute counterfactual values
         if player == traverser:
             # Sample one action for opponent actions
             # But compute exact counterfactual values for traverser
-            action_values = {}
+            action_values = []
             
-            for action in legal_actions:
-                # Make a copy and apply action
-                next_state = state.copy()
-                next_state.apply_action(action)
+            for action, prob in zip(legal_actions, strategy):
+                # Apply the action in place; it is undone after the recursion
+                undo = state.apply_action(action)
                 
                 # Recurse
                 if player == 0:
-                    action_values[action] = self._cfr_external(
-                        next_state, traverser, 
-                        reach_prob_0 * strategy[action], 
+                    action_values.append(self._cfr_external(
+                        state, traverser, 
+                        reach_prob_0 * prob, 
                         reach_prob_1
-                    )
+                    ))
                 else:
-                    action_values[action] = self._cfr_external(
-                        next_state, traverser,
+                    action_values.append(self._cfr_external(
+                        state, traverser,
                         reach_prob_0,
-                        reach_prob_1 * strategy[action]
-                    )
+                        reach_prob_1 * prob
+                    ))
+                state.undo(undo)
             
             # Expected value at this node
-            node_value = sum(strategy[a] * action_values[a] for a in legal_actions)
+            node_value = sum([prob * value for prob, value in zip(strategy, action_values)])
             
-            # Update regrets
+            # Update regrets (CFR+: cumulative regrets never go below zero) and
+            # the strategy sum (for average strategy, weighted by iteration) in one pass
             opponent_reach = reach_prob_1 if player == 0 else reach_prob_0
-            
-            for action in legal_actions:
-                regret = action_values[action] - node_value
-                self.regret_sum[infoset][action] += opponent_reach * regret
-            
-            # Update strategy sum (for average strategy)
-            my_reach = reach_prob_0 if player == 0 else reach_prob_1
-            for action in legal_actions:
-                self.strategy_sum[infoset][action] += my_reach * strategy[action]
+            my_reach = (reach_prob_0 if player == 0 else reach_prob_1) * self._average_weight
+            floor_regrets = self._floor_regrets
+            regrets = self.regret_sum[infoset]
+            strategy_totals = self.strategy_sum[infoset]
+            for action, prob, value in zip(legal_actions, strategy, action_values):
+                regret = regrets[action] + opponent_reach * (value - node_value)
+                regrets[action] = 0.0 if floor_regrets and regret < 0.0 else regret
+                strategy_totals[action] += my_reach * prob
             
             return node_value
         
         else:
             # Opponent node: sample one action
-            action = self.sample_action(strategy)
+            i = _sample_index(strategy)
             
-            next_state = state.copy()
-            next_state.apply_action(action)
+            undo = state.apply_action(legal_actions[i])
             
             if player == 0:
-                return self._cfr_external(
-                    next_state, traverser,
-                    reach_prob_0 * strategy[action],
+                value = self._cfr_external(
+                    state, traverser,
+                    reach_prob_0 * strategy[i],
                     reach_prob_1
                 )
             else:
-                return self._cfr_external(
-                    next_state, traverser,
+                value = self._cfr_external(
+                    state, traverser,
                     reach_prob_0,
-                    reach_prob_1 * strategy[action]
+                    reach_prob_1 * strategy[i]
                 )
+            state.undo(undo)
+            return value
+    
+    def _cfr_outcome(self, state, traverser, opponent_reach, sample_prob):
+        """
+        Outcome sampling CFR recursion (Lanctot et al.), which samples one
+        action at every node, mixing exploration into the traverser's choice.
+        
+        Args:
+            state: Current game state
+            traverser: Player whose regrets we're updating (0 or 1)
+            opponent_reach: Probability the opponent reaches this state
+            sample_prob: Probability the sampling policies reach this state
+        
+        Returns:
+            (traverser's payoff at the sampled terminal divided by its sample
+            probability, probability the current strategies play from this
+            state to that terminal)
+        """
+        if state.is_terminal:
+            return state.payoffs[traverser] / sample_prob, 1.0
+        
+        player = state.active_player
+        legal_actions = state.get_legal_actions()
+        # apply_action never stops on a node without a decision
+        assert legal_actions
+        
+        infoset = state.get_infoset_key(player)
+        strategy = self._regret_matching(infoset, legal_actions)
+        
+        if player == traverser:
+            # Mix in a uniform share so every action keeps being sampled
+            uniform = self.exploration / len(legal_actions)
+            sampling = [uniform + (1.0 - self.exploration) * prob for prob in strategy]
+            i = _sample_index(sampling)
+            
+            undo = state.apply_action(legal_actions[i])
+            value, tail_prob = self._cfr_outcome(state, traverser, opponent_reach,
+                                                 sample_prob * sampling[i])
+            state.undo(undo)
+            
+            # Sampled regrets: the chosen action gains what it is worth above
+            # this node, every action loses what this node is worth
+            weight = value * opponent_reach
+            node_tail_prob = tail_prob * strategy[i]
+            floor_regrets = self._floor_regrets
+            regrets = self.regret_sum[infoset]
+            for j, action in enumerate(legal_actions):
+                action_tail_prob = tail_prob if j == i else 0.0
+                regret = regrets[action] + weight * (action_tail_prob - node_tail_prob)
+                regrets[action] = 0.0 if floor_regrets and regret < 0.0 else regret
+            return value, node_tail_prob
+        
+        # Opponent node: sample from the current strategy, and add it to the
+        # average strategy weighted by the opponent's reach over the sample probability
+        weight = opponent_reach / sample_prob * self._average_weight
+        strategy_totals = self.strategy_sum[infoset]
+        for action, prob in zip(legal_actions, strategy):
+            strategy_totals[action] += weight * prob
+        
+        i = _sample_index(strategy)
+        undo = state.apply_action(legal_actions[i])
+        value, tail_prob = self._cfr_outcome(state, traverser, opponent_reach * strategy[i],
+                                             sample_prob * strategy[i])
+        state.undo(undo)
+        return value, tail_prob * strategy[i]
     
-    def train(self, iterations, verbose=True, save_every=None, save_path=None):
+    def train(self, iterations, verbose=True, save_every=None, save_path=None, compact_checkpoints=False,
+              compress_checkpoints=False):
         """
         Run multiple training iterations.
         
@@ -228,40 +332,162 @@ class MCCFRTrainer:
             verbose: Whether to print progress
             save_every: Save checkpoint every N iterations (None to disable)
             save_path: Path to save checkpoints
+            compact_checkpoints: Write checkpoints with save_compact_strategy,
+                regrets included, instead of save_strategy's nested dicts
+            compress_checkpoints: Gzip checkpoints, as with compress=True
         
         Returns:
             Average game value over iterations
         """
         total_value = 0.0
         
-        for i in range(iterations):
-            self.iteration += 1
+        # Checkpoints are snapshotted here, then pickled, compressed and
+        # written to disk by one background thread while training goes on
+        writer = ThreadPoolExecutor(max_workers=1) if save_every and save_path else None
+        pending = None
+        
+        try:
+            for i in range(iterations):
+                self.iteration += 1
+                
+                # Alternate which player we traverse (external sampling)
+                traverser = i % 2
+                
+                value = self.train_iteration(traverser)
+                total_value += value
+                
+                if self.variant == "dcfr" and self.discount_every and self.iteration % self.discount_every == 0:
+                    self.discount(self.iteration // self.discount_every)
+                
+                if verbose and (i + 1) % 100 == 0:
+                    avg_value = total_value / (i + 1)
+                    print(f"Iteration {i + 1}/{iterations}, Avg value: {avg_value:.4f}")
+                
+                # Save checkpoint
+                if writer is not None and (i + 1) % save_every == 0:
+                    data = self._checkpoint_data(compact_checkpoints)
+                    if pending is not None:
+                        # One write at a time, in order, and its errors surface here
+                        pending.result()
+                    pending = writer.submit(_dump_atomically, data, save_path, compress_checkpoints)
+                    if verbose:
+                        print(f"Writing checkpoint to {save_path}")
             
-            # Alternate which player we traverse (external sampling)
-            traverser = i % 2
+            if pending is not None:
+                pending.result()
+        finally:
+            if writer is not None:
+                # Never return while a checkpoint is still being written
+                writer.shutdown(wait=True)
+        
+        return total_value / iterations
+    
+    def train_parallel(self, iterations, processes=None, batch_size=1000, seed=None, verbose=True,
+                       save_every=None, save_path=None, compact_checkpoints=False,
+                       compress_checkpoints=False):
+        """
+        Run training iterations on a pool of worker processes.
+        
+        Each round, every worker copies the current tables, runs batch_size
+        iterations of its own from an independent seed, and sends back what it
+        added to regret_sum and strategy_sum. The sums are merged here before
+        the next round starts. With "dcfr", the discounts for blocks that ended
+        during a round are applied after its merge. Checkpoints are saved after
+        any round that passes a multiple of save_every iterations.
+        
+        Args:
+            iterations: Number of iterations to run, across all workers
+            processes: Number of worker processes (default: os.cpu_count())
+            batch_size: Iterations per worker between merges
+            seed: Seed for the workers' seeds (None for fresh ones)
+            verbose: Whether to print progress
+            save_every, save_path, compact_checkpoints, compress_checkpoints:
+                Checkpoint options, as for train
+        
+        Returns:
+            Average game value over iterations
+        """
+        processes = processes or os.cpu_count() or 1
+        rng = random.Random(seed)
+        total_value = 0.0
+        done = 0
+        # Workers never discount; discounts apply once, to the merged tables
+        options = {'sampling': self.sampling, 'exploration': self.exploration,
+                   'variant': self.variant, 'discount_every': 0}
+        
+        while done < iterations:
+            batches = []
+            while done < iterations and len(batches) < processes:
+                # Each batch continues the iteration count where the previous one stops
+                batches.append((min(batch_size, iterations - done), rng.getrandbits(64),
+                                self.iteration + done, options))
+                done += batches[-1][0]
             
-            value = self.train_iteration(traverser)
-            total_value += value
+            tables = (_plain_tables(self.regret_sum), _plain_tables(self.strategy_sum))
+            merged = set()
+            with Pool(processes=min(processes, len(batches)), initializer=_init_worker,
+                      initargs=tables) as pool:
+                for value, regret_delta, strategy_delta in pool.imap_unordered(_simulate_batch, batches):
+                    total_value += value
+                    _merge_tables(self.regret_sum, regret_delta)
+                    _merge_tables(self.strategy_sum, strategy_delta)
+                    merged.update(regret_delta)
+            if self._floor_regrets:
+                # Each worker floors its own copy, but their summed changes can
+                # still take a row below zero, so floor the merged rows again
+                for infoset in merged:
+                    row = self.regret_sum[infoset]
+                    row[:] = [regret if regret > 0.0 else 0.0 for regret in row]
+            start_iteration = self.iteration
+            self.iteration += sum(batch[0] for batch in batches)
+            if self.variant == "dcfr" and self.discount_every:
+                for block in range(start_iteration // self.discount_every + 1,
+                                   self.iteration // self.discount_every + 1):
+                    self.discount(block)
             
-            if verbose and (i + 1) % 100 == 0:
-                avg_value = total_value / (i + 1)
-                print(f"Iteration {i + 1}/{iterations}, Avg value: {avg_value:.4f}")
+            if verbose:
+                print(f"Iteration {done}/{iterations}, Avg value: {total_value / done:.4f}")
             
             # Save checkpoint
-            if save_every and save_path and (i + 1) % save_every == 0:
-                self.save_strategy(save_path)
+            if save_every and save_path and self.iteration // save_every > start_iteration // save_every:
+                _dump_atomically(self._checkpoint_data(compact_checkpoints), save_path,
+                                 compress_checkpoints)
                 if verbose:
                     print(f"Saved checkpoint to {save_path}")
         
         return total_value / iterations
     
-    def save_strategy(self, filepath):
+    def discount(self, block):
+        """
+        Apply discounted CFR's discounts for the end of discount block block
+        (counting from 1) to every row of regret_sum and strategy_sum.
+        """
+        positive = block ** DCFR_ALPHA / (block ** DCFR_ALPHA + 1)
+        negative = block ** DCFR_BETA / (block ** DCFR_BETA + 1)
+        average = (block / (block + 1)) ** DCFR_GAMMA
+        for row in self.regret_sum.values():
+            row[:] = [regret * positive if regret > 0.0 else regret * negative for regret in row]
+        for row in self.strategy_sum.values():
+            row[:] = [value * average for value in row]
+    
+    def save_strategy(self, filepath, compress=False):
         """
         Save the average strategy to a file.
         
         Args:
             filepath: Path to save strategy
+            compress: Gzip the file; load_strategy detects this itself
         """
+        _dump_atomically(self._strategy_data(), filepath, compress)
+    
+    def _checkpoint_data(self, compact):
+        """What a checkpoint pickles: compact rows with regrets, or save_strategy's dicts."""
+        if compact:
+            return self._compact_strategy_data(include_regrets=True)
+        return self._strategy_data()
+    
+    def _strategy_data(self):
+        """What save_strategy pickles, copied out of strategy_sum."""
         # Convert to regular dicts for pickling
         strategy_table = {}
         
@@ -270,29 +496,79 @@ class MCCFRTrainer:
         
         for infoset in all_infosets:
             # We don't know legal actions here, so save raw strategy_sum
-            strategy_table[infoset] = dict(self.strategy_sum[infoset])
+            strategy_table[infoset] = {action: value for action, value in enumerate(self.strategy_sum[infoset])
+                                       if value}
         
-        data = {
+        return {
             'strategy_sum': strategy_table,
             'iteration': self.iteration
         }
+    
+    def save_compact_strategy(self, filepath, include_regrets=False, quantize=False, compress=False):
+        """
+        Save the average strategy as flat rows: a list of infoset keys and one
+        array of NUM_ACTIONS doubles per key, back to back. Loads much faster
+        than the nested dicts written by save_strategy.
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(data, f)
+        Args:
+            filepath: Path to save strategy
+            include_regrets: Also store regret_sum the same way, so that training
+                loaded from this file picks up where it stopped
+            quantize: Store each strategy row normalized to unsigned 16-bit
+                fixed point (QUANT_SCALE is probability 1), a quarter of the size.
+                Keeps the average strategy but not how much weight it carries.
+            compress: Gzip the file, typically ten times smaller for a few ms
+                more per save; load_strategy detects this itself
+        """
+        _dump_atomically(self._compact_strategy_data(include_regrets, quantize), filepath, compress)
+    
+    def _compact_strategy_data(self, include_regrets=False, quantize=False):
+        """What save_compact_strategy pickles, copied out of the tables."""
+        keys, values = _pack_rows(self.strategy_sum)
+        data = {
+            'keys': keys,
+            'values': _quantize_rows(values) if quantize else values,
+            'num_actions': NUM_ACTIONS,
+            'iteration': self.iteration
+        }
+        if quantize:
+            data['scale'] = QUANT_SCALE
+        if include_regrets:
+            data['regret_keys'], data['regret_values'] = _pack_rows(self.regret_sum)
+        return data
     
     def load_strategy(self, filepath):
         """
-        Load a saved strategy.
+        Load a saved strategy, written by save_strategy or save_compact_strategy,
+        compressed or not.
         
         Args:
             filepath: Path to load strategy from
         """
         with open(filepath, 'rb') as f:
-            data = pickle.load(f)
-        
-        self.strategy_sum = defaultdict(lambda: defaultdict(float))
+            compressed = f.read(2) == _GZIP_MAGIC
+            f.seek(0)
+            data = pickle.load(gzip.GzipFile(fileobj=f) if compressed else f)
+        
+        self.strategy_sum = defaultdict(_new_row)
+        
+        if 'values' in data:
+            num_actions = data['num_actions']
+            values = data['values']
+            if 'scale' in data:
+                # Quantized rows: back to probabilities
+                values = array('d', [value / data['scale'] for value in values])
+            _unpack_rows(self.strategy_sum, data['keys'], values, num_actions)
+            if 'regret_values' in data:
+                self.regret_sum = defaultdict(_new_row)
+                _unpack_rows(self.regret_sum, data['regret_keys'], data['regret_values'], num_actions)
+            self.iteration = data.get('iteration', 0)
+            return
         
         for infoset, actions in data['strategy_sum'].items():
+            if isinstance(infoset, str):
+                # Strategies saved before infoset keys were packed integers
+                infoset = parse_infoset_key(infoset)
             for action, value in actions.items():
                 self.strategy_sum[infoset][action] = value
         
@@ -329,10 +605,7 @@ class MCCFRTrainer:
         
         active = state.active_player
         legal_actions = state.get_legal_actions()
-        
-        if not legal_actions:
-            state._advance_street()
-            return self._evaluate_strategy(state, player)
+        assert legal_actions
         
         infoset = state.get_infoset_key(active)
         strategy = self.get_average_strategy(infoset, legal_actions)
@@ -342,6 +615,135 @@ class MCCFRTrainer:
         return self._evaluate_strategy(state, player)
 
 
+def _sample_index(probs):
+    """Index drawn from a list of probabilities, as random.choices would without its overhead."""
+    cum_probs = list(accumulate(probs))
+    return bisect_right(cum_probs, random.random() * cum_probs[-1], 0, len(cum_probs) - 1)
+
+
+def _dump_atomically(data, filepath, compress=False):
+    """
+    Pickle data to a temporary file beside filepath, then rename it over
+    filepath, so an interrupted save never leaves a partly written file.
+    With compress, the pickle is gzipped at the fastest level.
+    """
+    tmp_path = f"{filepath}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            if compress:
+                with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=1, mtime=0) as gz:
+                    pickle.dump(data, gz)
+            else:
+                pickle.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _new_row():
+    """Zeroed per-infoset row of NUM_ACTIONS values."""
+    return [0.0] * NUM_ACTIONS
+
+
+# Row for infosets a table has never seen
+_EMPTY_ROW = (0.0,) * NUM_ACTIONS
+
+
+def _pack_rows(table):
+    """A table's infoset keys, and its rows back to back in one array of doubles."""
+    return list(table.keys()), array('d', chain.from_iterable(table.values()))
+
+
+def _quantize_rows(values):
+    """Each NUM_ACTIONS row of values normalized to sum to QUANT_SCALE, as unsigned 16-bit ints."""
+    quantized = array('H', bytes(2 * len(values)))
+    for start in range(0, len(values), NUM_ACTIONS):
+        row = values[start:start + NUM_ACTIONS]
+        total = sum(row)
+        if total > 0:
+            quantized[start:start + NUM_ACTIONS] = array('H', [round(value / total * QUANT_SCALE)
+                                                               for value in row])
+    return quantized
+
+
+def _unpack_rows(table, keys, values, num_actions):
+    """Fill a table from keys and back-to-back rows of num_actions values."""
+    pad = [0.0] * (NUM_ACTIONS - num_actions)
+    for i, infoset in enumerate(keys):
+        table[infoset] = values[i * num_actions:(i + 1) * num_actions].tolist() + pad
+
+
+def _plain_tables(table):
+    """Copy a defaultdict table into a plain dict of rows, which can be pickled."""
+    return {infoset: row[:] for infoset, row in table.items()}
+
+
+def _merge_tables(table, delta):
+    """Add a worker's per-infoset changes into a trainer table."""
+    for infoset, changes in delta.items():
+        row = table[infoset]
+        for action in range(NUM_ACTIONS):
+            row[action] += changes[action]
+
+
+def _table_delta(table, base):
+    """What training added to table since it was copied from base."""
+    delta = {}
+    for infoset, row in table.items():
+        base_row = base.get(infoset)
+        if base_row is None:
+            delta[infoset] = row
+        elif row != base_row:
+            delta[infoset] = [value - base_value for value, base_value in zip(row, base_row)]
+    return delta
+
+
+# Tables copied into each worker process by _init_worker
+_worker_tables = None
+
+
+def _init_worker(regret_sum, strategy_sum):
+    """Pool initializer: keep the tables this round starts from."""
+    global _worker_tables
+    _worker_tables = (regret_sum, strategy_sum)
+
+
+def _simulate_batch(batch):
+    """
+    Pool task for MCCFRTrainer.train_parallel: run a batch of iterations from
+    the round's starting tables.
+    
+    Args:
+        batch: (iterations, seed, iteration count to start from, MCCFRTrainer
+            keyword arguments) tuple
+    
+    Returns:
+        (total game value, regret_sum changes, strategy_sum changes)
+    """
+    iterations, seed, start_iteration, options = batch
+    regret_sum, strategy_sum = _worker_tables
+    trainer = MCCFRTrainer(**options)
+    trainer.iteration = start_iteration
+    _merge_tables(trainer.regret_sum, regret_sum)
+    _merge_tables(trainer.strategy_sum, strategy_sum)
+    
+    random.seed(seed)
+    value = trainer.train(iterations, verbose=False) * iterations
+    return (value, _table_delta(trainer.regret_sum, regret_sum),
+            _table_delta(trainer.strategy_sum, strategy_sum))
+
+
+# Prefer the compiled recursion from mccfr_c.pyx when setup.py has built it
+try:
+    import mccfr_c as _mccfr_c
+except ImportError:
+    _mccfr_c = None
+
+
 if __name__ == "__main__":
     # Quick test
     print("Testing MCCFR trainer...")
@@ -355,11 +757,11 @@ if __name__ == "__main__":
     
     # Show a few example strategies
     print("\nExample strategies (first 5 infosets):")
-    for i, infoset in enumerate(list(trainer.strategy_sum.keys())[:5]):
+    for i, infoset in enumerate(islice(trainer.strategy_sum, 5)):
         actions = trainer.strategy_sum[infoset]
-        print(f"{infoset}:")
-        for action, count in actions.items():
-            if action in ACTION_NAMES:
+        print(f"{infoset_key_to_str(infoset)}:")
+        for action, count in enumerate(actions):
+            if count:
                 print(f"  {ACTION_NAMES[action]}: {count:.2f}")
 
 
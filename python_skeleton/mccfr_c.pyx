@@ -0,0 +1,112 @@
+# cython: language_level=3
+'''
+Compiled external-sampling recursion for mccfr.py.
+
+Mirrors MCCFRTrainer._cfr_external on the same GameState and table rows, with
+regret matching, the regret and average-strategy updates, reach probabilities
+and action sampling kept in C doubles.
+Opponent actions are drawn from the global random module exactly as
+random.choices would, so seeded runs give the same tables as the pure-Python
+recursion up to floating-point rounding; the built-in sum() the Python path uses
+rounds differently from a plain loop on CPython 3.12+. setup.py builds this
+module, and mccfr.py keeps its Python recursion when it has not been built.
+'''
+import random
+
+cdef enum:
+    MAX_ACTIONS = 9  # NUM_ACTIONS, the most a legal-action tuple can hold
+
+
+def cfr_external(object regret_sum, object strategy_sum, object state, int traverser,
+                 double reach_prob_0, double reach_prob_1, double weight, bint floor_regrets=True):
+    '''
+    Expected value for the traverser at state, updating regret_sum and strategy_sum
+    at the traverser's nodes; strategy_sum gains weight times the usual amount, and
+    regrets are floored at zero (CFR+) when floor_regrets is set.
+    '''
+    return _cfr(regret_sum, strategy_sum, state, traverser, reach_prob_0, reach_prob_1, weight,
+                floor_regrets, random.random)
+
+
+cdef double _cfr(object regret_sum, object strategy_sum, object state, int traverser,
+                 double reach_prob_0, double reach_prob_1, double weight, bint floor_regrets,
+                 object rand) except? -1.0:
+    cdef double strategy[MAX_ACTIONS]
+    cdef double action_values[MAX_ACTIONS]
+    cdef double regret, total_positive, node_value, opponent_reach, my_reach, cum, target
+    cdef int player, num_actions, i
+    cdef tuple legal_actions
+    cdef list regrets, strategy_totals
+    cdef object action, undo
+    cdef double value
+
+    if state.is_terminal:
+        return state.payoffs[traverser]
+
+    player = state.active_player
+    legal_actions = state.get_legal_actions()
+    num_actions = len(legal_actions)
+
+    # apply_action never stops on a node without a decision
+    assert num_actions > 0
+
+    infoset = state.get_infoset_key(player)
+
+    # Regret matching over the legal actions
+    regrets = regret_sum[infoset]
+    total_positive = 0.0
+    for i in range(num_actions):
+        regret = regrets[legal_actions[i]]
+        strategy[i] = regret if regret > 0.0 else 0.0
+        total_positive += strategy[i]
+    if total_positive <= 0:
+        for i in range(num_actions):
+            strategy[i] = 1.0 / num_actions
+    else:
+        for i in range(num_actions):
+            strategy[i] = strategy[i] / total_positive
+
+    if player == traverser:
+        node_value = 0.0
+        for i in range(num_actions):
+            undo = state.apply_action(legal_actions[i])
+            if player == 0:
+                action_values[i] = _cfr(regret_sum, strategy_sum, state, traverser,
+                                        reach_prob_0 * strategy[i], reach_prob_1, weight, floor_regrets, rand)
+            else:
+                action_values[i] = _cfr(regret_sum, strategy_sum, state, traverser,
+                                        reach_prob_0, reach_prob_1 * strategy[i], weight, floor_regrets, rand)
+            state.undo(undo)
+            node_value += strategy[i] * action_values[i]
+
+        # CFR+: cumulative regrets never go below zero when floor_regrets is set.
+        # Linear averaging: this iteration's strategy counts with weight
+        opponent_reach = reach_prob_1 if player == 0 else reach_prob_0
+        my_reach = (reach_prob_0 if player == 0 else reach_prob_1) * weight
+        strategy_totals = strategy_sum[infoset]
+        for i in range(num_actions):
+            action = legal_actions[i]
+            regret = regrets[action] + opponent_reach * (action_values[i] - node_value)
+            regrets[action] = 0.0 if floor_regrets and regret < 0.0 else regret
+            strategy_totals[action] += my_reach * strategy[i]
+        return node_value
+
+    # Opponent node: sample one action the way random.choices does
+    cum = 0.0
+    for i in range(num_actions):
+        cum += strategy[i]
+        action_values[i] = cum
+    target = rand() * cum
+    i = 0
+    while i < num_actions - 1 and not target < action_values[i]:
+        i += 1
+
+    undo = state.apply_action(legal_actions[i])
+    if player == 0:
+        value = _cfr(regret_sum, strategy_sum, state, traverser,
+                     reach_prob_0 * strategy[i], reach_prob_1, weight, floor_regrets, rand)
+    else:
+        value = _cfr(regret_sum, strategy_sum, state, traverser,
+                     reach_prob_0, reach_prob_1 * strategy[i], weight, floor_regrets, rand)
+    state.undo(undo)
+    return value
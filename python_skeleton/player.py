@@ -8,8 +8,14 @@ from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
 
 import os
+from bucketing import append_history
 from cfr_policy import CFRPolicy
 
+# Betting history token recorded for each of our betting actions
+HISTORY_TOKENS = {FoldAction: "F", CheckAction: "C", CallAction: "C", RaiseAction: "R"}
+# ... and for discarding the card at each index
+DISCARD_TOKENS = ("D0", "D1", "D2")
+
 
 class Player(Bot):
     '''
@@ -33,7 +39,7 @@ class Player(Bot):
         # Track game state
         self.my_discarded_card = None
         self.opp_discarded_card = None
-        self.betting_history_current_street = []
+        self.betting_history_current_street = 0  # packed by bucketing.append_history
 
     def handle_new_round(self, game_state, round_state, active):
         '''
@@ -50,7 +56,8 @@ class Player(Bot):
         # Reset round-specific tracking
         self.my_discarded_card = None
         self.opp_discarded_card = None
-        self.betting_history_current_street = []
+        self.betting_history_current_street = 0
+        self.policy.reset_hand()
 
     def handle_round_over(self, game_state, terminal_state, active):
         '''
@@ -131,7 +138,7 @@ class Player(Bot):
         
         # Reset betting history on new street
         if round_state.previous_state is None or round_state.previous_state.street != street:
-            self.betting_history_current_street = []
+            self.betting_history_current_street = 0
         
         # Handle discard action
         if DiscardAction in legal_actions:
@@ -147,7 +154,8 @@ class Player(Bot):
                 self.my_discarded_card = my_cards[discard_idx]
             
             action = DiscardAction(discard_idx)
-            self.betting_history_current_street.append(f"D{discard_idx}")
+            self.betting_history_current_street = append_history(
+                self.betting_history_current_street, DISCARD_TOKENS[discard_idx])
             return action
         
         # Handle betting action
@@ -169,12 +177,9 @@ class Player(Bot):
         )
         
         # Track action in history
-        if isinstance(action, FoldAction):
-            self.betting_history_current_street.append("F")
-        elif isinstance(action, (CheckAction, CallAction)):
-            self.betting_history_current_street.append("C")
-        elif isinstance(action, RaiseAction):
-            self.betting_history_current_street.append("R")
+        token = HISTORY_TOKENS.get(type(action))
+        if token:
+            self.betting_history_current_street = append_history(self.betting_history_current_street, token)
         
         return action
 
@@ -0,0 +1,21 @@
+'''
+Builds the optional Cython kernels in place; this is the bot's "build" step in
+commands.json:
+
+    python3 setup.py build_ext --inplace
+
+Each module imports its kernel only when it has been built here, and keeps its
+pure-Python version otherwise.
+'''
+from setuptools import setup
+from Cython.Build import cythonize
+
+KERNELS = [
+    'hand_evaluator_c.pyx',  # cimported by bucketing_c and equity_c
+    'bucketing_c.pyx',
+    'equity_c.pyx',
+    'mccfr_c.pyx',
+]
+
+# packages=[] skips package discovery, which would pick up the skeleton package
+setup(packages=[], ext_modules=cythonize(KERNELS, language_level=3))
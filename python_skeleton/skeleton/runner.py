@@ -3,11 +3,20 @@ The infrastructure for interacting with the engine.
 '''
 import argparse
 import socket
-from .actions import FoldAction, CallAction, CheckAction, RaiseAction, DiscardAction
+from .actions import FoldAction, CallAction, CheckAction, RaiseAction, DiscardAction, FOLD, CALL, CHECK
 from .states import GameState, TerminalState, RoundState
 from .states import STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from .bot import Bot
 
+# action type -> function that builds the engine's code for that action
+ENCODE = {
+    FoldAction: lambda action: 'F',
+    CallAction: lambda action: 'C',
+    CheckAction: lambda action: 'K',
+    DiscardAction: lambda action: 'D' + str(action.card),  # action.card is the index of the action card in the player's hand
+    RaiseAction: lambda action: 'R' + str(action.amount),
+}
+
 
 class Runner():
     '''
@@ -32,17 +41,7 @@ class Runner():
         '''
         Encodes an action and sends it to the engine.
         '''
-        if isinstance(action, FoldAction):
-            code = 'F'
-        elif isinstance(action, CallAction):
-            code = 'C'
-        elif isinstance(action, CheckAction):
-            code = 'K'
-        elif isinstance(action, DiscardAction):
-            code = 'D' + str(action.card)## action.card is the index of the action card in the player's hand
-        else:  # isinstance(action, RaiseAction)
-            code = 'R' + str(action.amount)
-        self.socketfile.write(code + '\n')
+        self.socketfile.write(ENCODE[type(action)](action) + '\n')
         self.socketfile.flush()
 
     def run(self):
@@ -74,11 +73,11 @@ class Runner():
                         self.pokerbot.handle_new_round(game_state, round_state, active)
                         round_flag = False
                 elif clause[0] == 'F':
-                    round_state = round_state.proceed(FoldAction())
+                    round_state = round_state.proceed(FOLD)
                 elif clause[0] == 'C':
-                    round_state = round_state.proceed(CallAction())
+                    round_state = round_state.proceed(CALL)
                 elif clause[0] == 'K':
-                    round_state = round_state.proceed(CheckAction())
+                    round_state = round_state.proceed(CHECK)
                 elif clause[0] == 'D':
                     if isinstance(round_state, RoundState):
                         round_state = round_state.proceed(DiscardAction(int(clause[1:])))
@@ -114,7 +113,7 @@ class Runner():
                 elif clause[0] == 'Q':
                     return
             if round_flag or isinstance(round_state, TerminalState):  # ack the engine
-                self.send(CheckAction())
+                self.send(CHECK)
             else:
                 ##assert active == round_state.button % 2
                 action = self.pokerbot.get_action(game_state, round_state, active)
@@ -2,6 +2,7 @@
 Encapsulates game and round state information for the player.
 '''
 from collections import namedtuple
+from functools import cached_property
 from .actions import FoldAction, CallAction, CheckAction, RaiseAction, DiscardAction
 
 GameState = namedtuple('GameState', ['bankroll', 'game_clock', 'round_num'])
@@ -27,6 +28,19 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         '''
         Returns a set which corresponds to the active player's legal moves.
         '''
+        return self._legal_actions
+
+    def raise_bounds(self):
+        '''
+        Returns a tuple of the minimum and maximum legal raises.
+        '''
+        return self._raise_bounds
+
+    @cached_property
+    def _legal_actions(self):
+        '''
+        Computes legal_actions() once per state; the result is stored on the instance.
+        '''
         active = self.button % 2
         continue_cost = self.pips[1-active] - self.pips[active]
         if self.street in (2, 3):
@@ -40,9 +54,10 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         raises_forbidden = (continue_cost == self.stacks[active] or self.stacks[1-active] == 0)
         return {FoldAction, CallAction} if raises_forbidden else {FoldAction, CallAction, RaiseAction}
 
-    def raise_bounds(self):
+    @cached_property
+    def _raise_bounds(self):
         '''
-        Returns a tuple of the minimum and maximum legal raises.
+        Computes raise_bounds() once per state; the result is stored on the instance.
         '''
         active = self.button % 2
         continue_cost = self.pips[1-active] - self.pips[active]
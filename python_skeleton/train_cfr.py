@@ -6,12 +6,19 @@ Usage:
     python train_cfr.py --iterations 10000 --output cfr_strategy.pkl
     python train_cfr.py --iterations 50000 --output cfr_strategy.pkl --verbose
     python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --save-every 5000
+    python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --eval-cache eval_cache.pkl
+    python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --compact
+    python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --compact --save-regrets
+    python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --compact --quantize
+    python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --compact --compress
+    python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --workers 8
+    python train_cfr.py --iterations 1000000 --output cfr_strategy.pkl --sampling outcome
+    python train_cfr.py --iterations 100000 --output cfr_strategy.pkl --cfr-variant dcfr
 '''
 
 import argparse
 import time
-from mccfr import MCCFRTrainer
-from game_abstraction import ACTION_NAMES
+from itertools import islice
 
 def main():
     parser = argparse.ArgumentParser(description='Train MCCFR poker bot')
@@ -41,7 +48,7 @@ def main():
         '--save-every',
         type=int,
         default=None,
-        help='Save checkpoint every N iterations (default: only save at end)'
+        help='Save checkpoint every N iterations; with --workers, after the merge that passes each N (default: only save at end)'
     )
     
     parser.add_argument(
@@ -57,13 +64,94 @@ def main():
         help='Evaluate exploitability every N iterations (default: None, expensive)'
     )
     
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Save checkpoints and the final strategy as flat rows, which save and load faster (default: nested dicts)'
+    )
+    
+    parser.add_argument(
+        '--save-regrets',
+        action='store_true',
+        help='With --compact, also save regret sums so --load resumes training exactly (default: strategy only)'
+    )
+    
+    parser.add_argument(
+        '--quantize',
+        action='store_true',
+        help='With --compact, store strategy rows as 16-bit fixed point, a quarter of the size (default: doubles)'
+    )
+    
+    parser.add_argument(
+        '--compress',
+        action='store_true',
+        help='Gzip checkpoints and the final strategy, typically ten times smaller (default: uncompressed)'
+    )
+    
+    parser.add_argument(
+        '--eval-cache',
+        type=str,
+        default=None,
+        help='Hand evaluation cache file, loaded before and saved after training (default: None)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Train on this many processes, merging every --batch-size iterations per worker (default: single process)'
+    )
+    
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help='Iterations each worker runs between merges with --workers (default: 1000)'
+    )
+    
+    parser.add_argument(
+        '--sampling',
+        choices=('external', 'outcome'),
+        default='external',
+        help='MCCFR sampling scheme; outcome iterations are much cheaper but noisier (default: external)'
+    )
+    
+    parser.add_argument(
+        '--exploration',
+        type=float,
+        default=0.6,
+        help='With --sampling outcome, uniform share mixed into the traverser\'s sampling (default: 0.6)'
+    )
+    
+    parser.add_argument(
+        '--cfr-variant',
+        choices=('vanilla', 'plus', 'dcfr'),
+        default='plus',
+        help='Regret and averaging scheme: vanilla CFR, CFR+ or discounted CFR (default: plus)'
+    )
+    
+    parser.add_argument(
+        '--discount-every',
+        type=int,
+        default=1000,
+        help='With --cfr-variant dcfr, iterations between discounts of the tables (default: 1000)'
+    )
+    
     args = parser.parse_args()
     
+    # Imported only now, so --help and argument errors skip building the hand tables
+    from mccfr import MCCFRTrainer
+    from game_abstraction import ACTION_NAMES
+    from bucketing import infoset_key_to_str
+    from hand_evaluator import load_evaluation_cache, save_evaluation_cache
+    
     print("=" * 60)
     print("MCCFR Poker Bot Training")
     print("=" * 60)
     print(f"Iterations: {args.iterations}")
     print(f"Output file: {args.output}")
+    print(f"Sampling: {args.sampling}")
+    print(f"CFR variant: {args.cfr_variant}")
     if args.load:
         print(f"Loading from: {args.load}")
     if args.save_every:
@@ -71,7 +159,8 @@ def main():
     print("=" * 60)
     
     # Initialize trainer
-    trainer = MCCFRTrainer()
+    trainer = MCCFRTrainer(sampling=args.sampling, exploration=args.exploration,
+                           variant=args.cfr_variant, discount_every=args.discount_every)
     
     # Load existing strategy if specified
     if args.load:
@@ -83,17 +172,34 @@ def main():
             print(f"Warning: Could not load strategy: {e}")
             print("Starting fresh training...")
     
+    if args.eval_cache:
+        print(f"Loaded {load_evaluation_cache(args.eval_cache)} cached hand evaluations")
+    
     # Training
     print("\nStarting training...\n")
     start_time = time.time()
     
     try:
-        avg_value = trainer.train(
-            iterations=args.iterations,
-            verbose=args.verbose or True,
-            save_every=args.save_every,
-            save_path=args.output if args.save_every else None
-        )
+        if args.workers:
+            avg_value = trainer.train_parallel(
+                iterations=args.iterations,
+                processes=args.workers,
+                batch_size=args.batch_size,
+                verbose=args.verbose,
+                save_every=args.save_every,
+                save_path=args.output if args.save_every else None,
+                compact_checkpoints=args.compact,
+                compress_checkpoints=args.compress
+            )
+        else:
+            avg_value = trainer.train(
+                iterations=args.iterations,
+                verbose=args.verbose,
+                save_every=args.save_every,
+                save_path=args.output if args.save_every else None,
+                compact_checkpoints=args.compact,
+                compress_checkpoints=args.compress
+            )
         
         elapsed = time.time() - start_time
         
@@ -114,9 +220,17 @@ def main():
         
         # Save final strategy
         print(f"\nSaving strategy to {args.output}...")
-        trainer.save_strategy(args.output)
+        if args.compact:
+            trainer.save_compact_strategy(args.output, include_regrets=args.save_regrets,
+                                          quantize=args.quantize, compress=args.compress)
+        else:
+            trainer.save_strategy(args.output, compress=args.compress)
         print("Strategy saved successfully!")
         
+        if args.eval_cache:
+            save_evaluation_cache(args.eval_cache)
+            print(f"Hand evaluation cache saved to {args.eval_cache}")
+        
         # Print some sample strategies
         print("\n" + "=" * 60)
         print("Sample Information Sets (first 10):")
@@ -124,18 +238,20 @@ def main():
         
         
         
-        for i, infoset in enumerate(list(trainer.strategy_sum.keys())[:10]):
-            print(f"\n{i+1}. {infoset}")
+        for i, infoset in enumerate(islice(trainer.strategy_sum, 10)):
+            print(f"\n{i+1}. {infoset_key_to_str(infoset)}")
             
             # Get all actions for this infoset
             actions = trainer.strategy_sum[infoset]
-            total = sum(actions.values())
+            total = sum(actions)
             
             if total > 0:
                 print("   Strategy:")
-                for action, count in sorted(actions.items(), key=lambda x: x[1], reverse=True):
+                for action, count in sorted(enumerate(actions), key=lambda x: x[1], reverse=True):
+                    if not count:
+                        continue
                     prob = count / total
-                    action_name = ACTION_NAMES.get(int(action), f"Action {action}")
+                    action_name = ACTION_NAMES[action]
                     print(f"     {action_name}: {prob:.3f}")
         
         print("\n" + "=" * 60)
@@ -145,7 +261,10 @@ def main():
     except KeyboardInterrupt:
         print("\n\nTraining interrupted by user!")
         print("Saving current progress...")
-        trainer.save_strategy(args.output)
+        if args.compact:
+            trainer.save_compact_strategy(args.output, include_regrets=True, compress=args.compress)
+        else:
+            trainer.save_strategy(args.output, compress=args.compress)
         print(f"Strategy saved to {args.output}")
         print(f"Completed {trainer.iteration} iterations")
     
@@ -155,9 +274,14 @@ def main():
         traceback.print_exc()
         print("\nAttempting to save progress...")
         try:
-            trainer.save_strategy(args.output + ".error_backup")
-            print(f"Progress saved to {args.output}.error_backup")
-        except:
+            # The tables may be half-updated, so keep them apart from the last good checkpoint
+            backup = args.output + ".error_backup"
+            if args.compact:
+                trainer.save_compact_strategy(backup, include_regrets=True, compress=args.compress)
+            else:
+                trainer.save_strategy(backup, compress=args.compress)
+            print(f"Progress saved to {backup}")
+        except Exception:
             print("Could not save progress")
 
 
@@ -0,0 +1,227 @@
+# cython: language_level=3
+'''
+Compiled RoundState for the game engine.
+
+Mirrors engine.RoundState with typed integer fields for the button, street, pips
+and stacks. Build it in place with `python setup.py build_ext --inplace`; engine.py
+falls back to its pure-Python RoundState when it has not been built.
+'''
+import pkrbot
+
+# bound by configure() so that this class shares engine.py's action and state types
+cdef object FoldAction = None
+cdef object CallAction = None
+cdef object CheckAction = None
+cdef object RaiseAction = None
+cdef object DiscardAction = None
+cdef object TerminalState = None
+cdef int STARTING_STACK = 0
+cdef int BIG_BLIND = 0
+
+
+def configure(fold, call, check, raise_, discard, terminal, int starting_stack, int big_blind):
+    '''
+    Binds the engine's action types, TerminalState and stack parameters.
+    '''
+    global FoldAction, CallAction, CheckAction, RaiseAction, DiscardAction, TerminalState
+    global STARTING_STACK, BIG_BLIND
+    FoldAction = fold
+    CallAction = call
+    CheckAction = check
+    RaiseAction = raise_
+    DiscardAction = discard
+    TerminalState = terminal
+    STARTING_STACK = starting_stack
+    BIG_BLIND = big_blind
+
+
+cdef RoundState _make(int button, int street, int pip0, int pip1, int stack0, int stack1,
+                      object hands, object deck, object board, object previous_state):
+    '''
+    Builds a RoundState without going through __init__ and its list unpacking.
+    '''
+    cdef RoundState state = RoundState.__new__(RoundState)
+    state.button = button
+    state.street = street
+    state.pip0 = pip0
+    state.pip1 = pip1
+    state.stack0 = stack0
+    state.stack1 = stack1
+    state.hands = hands
+    state.deck = deck
+    state.board = board
+    state.previous_state = previous_state
+    return state
+
+
+cdef class RoundState:
+    '''
+    Encodes the game tree for one round of poker.
+    '''
+    cdef readonly int button, street
+    cdef int pip0, pip1, stack0, stack1
+    cdef readonly object hands, deck, board, previous_state
+    cdef object _legal
+    cdef object _bounds
+
+    def __init__(self, int button, int street, pips, stacks, hands, deck, board, previous_state):
+        self.button = button
+        self.street = street
+        self.pip0, self.pip1 = pips
+        self.stack0, self.stack1 = stacks
+        self.hands = hands
+        self.deck = deck
+        self.board = board
+        self.previous_state = previous_state
+
+    @property
+    def pips(self):
+        return [self.pip0, self.pip1]
+
+    @property
+    def stacks(self):
+        return [self.stack0, self.stack1]
+
+    cpdef int get_delta(self, int winner_index):
+        '''
+        Returns the delta for player A and -delta for player B.
+
+        Stacks are integers here, so the delta never needs rounding.
+        '''
+        assert 0 <= winner_index <= 2
+        if winner_index == 2:
+            # split pots only happen on the river + equal stacks
+            assert self.stack0 == self.stack1
+            return 0
+        if winner_index == 0:
+            return STARTING_STACK - self.stack1
+        return self.stack0 - STARTING_STACK
+
+    def showdown(self):
+        '''
+        Compares the players' hands and computes the final payoffs at showdown.
+        '''
+        cdef int delta
+        board_size = len(self.board)
+        cards = self.board + self.hands[0]
+        score0 = pkrbot.evaluate(cards)
+        cards[board_size:] = self.hands[1]
+        score1 = pkrbot.evaluate(cards)
+        assert self.stack0 == self.stack1
+        if score0 > score1:
+            delta = self.get_delta(0)
+        elif score0 < score1:
+            delta = self.get_delta(1)
+        else:
+            delta = self.get_delta(2)
+        return TerminalState([delta, -delta], self)
+
+    def legal_actions(self):
+        '''
+        Returns a set which corresponds to the active player's legal moves.
+        '''
+        if self._legal is None:
+            self._legal = self._compute_legal_actions()
+        return self._legal
+
+    cdef object _compute_legal_actions(self):
+        cdef int active = self.button % 2
+        cdef int my_stack = self.stack1 if active else self.stack0
+        cdef int opp_stack = self.stack0 if active else self.stack1
+        cdef int continue_cost = (self.pip0 - self.pip1) if active else (self.pip1 - self.pip0)
+        if self.street == 2 or self.street == 3:
+            return {DiscardAction} if active != self.street % 2 else {CheckAction}
+        if continue_cost == 0:
+            # we can only raise the stakes if both players can afford it
+            if self.stack0 == 0 or self.stack1 == 0:
+                return {CheckAction, FoldAction}
+            return {CheckAction, RaiseAction, FoldAction}
+        # similarly, re-raising is only allowed if both players can afford it
+        if continue_cost == my_stack or opp_stack == 0:
+            return {FoldAction, CallAction}
+        return {FoldAction, CallAction, RaiseAction}
+
+    def raise_bounds(self):
+        '''
+        Returns a tuple of the minimum and maximum legal raises.
+        '''
+        cdef int active, my_pip, continue_cost, max_contribution, min_contribution
+        if self._bounds is None:
+            active = self.button % 2
+            my_pip = self.pip1 if active else self.pip0
+            continue_cost = (self.pip0 - self.pip1) if active else (self.pip1 - self.pip0)
+            max_contribution = min(self.stack1 if active else self.stack0,
+                                   (self.stack0 if active else self.stack1) + continue_cost)
+            min_contribution = min(max_contribution, continue_cost + max(continue_cost, BIG_BLIND))
+            self._bounds = (my_pip + min_contribution, my_pip + max_contribution)
+        return self._bounds
+
+    def proceed_street(self):
+        '''
+        Resets the players' pips and advances the game tree to the next round of betting and updates the board state.
+        '''
+        cdef int new_street, button
+        if self.street == 6:
+            return self.showdown()
+        elif self.street == 0:
+            new_street = 2
+            button = 1  # Player B discards first, since they are out of position
+            self.board.extend(self.deck.peek(new_street))
+        elif self.street == 2:
+            new_street = 3
+            button = 0  # Player A discards second
+        elif self.street == 3:
+            new_street = 4
+            button = 1  # Player B acts first after the discard phase
+        else:
+            new_street = self.street + 1
+            button = 1
+            self.board.append(self.deck.peek(new_street - 1)[new_street - 2])
+        return _make(button, new_street, 0, 0, self.stack0, self.stack1,
+                     self.hands, self.deck, self.board, self)
+
+    def proceed(self, action):
+        '''
+        Advances the game tree by one action performed by the active player.
+        '''
+        cdef int active = self.button % 2
+        cdef int delta, amount
+        cdef RoundState state
+        action_type = type(action)
+        if action_type is CheckAction:
+            if (self.street == 0 and self.button > 0) or self.button > 1 or self.street == 2 or self.street == 3:  # both players acted
+                return self.proceed_street()
+            # let opponent act
+            return _make(self.button + 1, self.street, self.pip0, self.pip1, self.stack0, self.stack1,
+                         self.hands, self.deck, self.board, self)
+        if action_type is CallAction:
+            if self.button == 0:  # sb calls bb
+                return _make(1, 0, BIG_BLIND, BIG_BLIND, STARTING_STACK - BIG_BLIND, STARTING_STACK - BIG_BLIND,
+                             self.hands, self.deck, self.board, self)
+            # both players acted, so the active player matches the opponent's pip
+            if active == 0:
+                state = _make(self.button + 1, self.street, self.pip1, self.pip1,
+                              self.stack0 - (self.pip1 - self.pip0), self.stack1,
+                              self.hands, self.deck, self.board, self)
+            else:
+                state = _make(self.button + 1, self.street, self.pip0, self.pip0,
+                              self.stack0, self.stack1 - (self.pip0 - self.pip1),
+                              self.hands, self.deck, self.board, self)
+            return state.proceed_street()
+        if action_type is RaiseAction:
+            amount = action.amount
+            if active == 0:
+                return _make(self.button + 1, self.street, amount, self.pip1,
+                             self.stack0 - (amount - self.pip0), self.stack1,
+                             self.hands, self.deck, self.board, self)
+            return _make(self.button + 1, self.street, self.pip0, amount,
+                         self.stack0, self.stack1 - (amount - self.pip1),
+                         self.hands, self.deck, self.board, self)
+        if action_type is FoldAction:
+            delta = self.get_delta(1 - active)  # if active folds, the other player (1 - active) wins
+            return TerminalState([delta, -delta], self)
+        # DiscardAction
+        if len(self.hands[active]) != 0:
+            self.board.append(self.hands[active].pop(action.card))
+        return _make(1 - active, self.street, self.pip0, self.pip1, self.stack0, self.stack1,
+                     self.hands, self.deck, self.board, self)
@@ -0,0 +1,12 @@
+'''
+Builds the optional compiled RoundState from roundstate.pyx in place:
+
+    python setup.py build_ext --inplace
+
+engine.py falls back to its pure-Python RoundState when it has not been built.
+'''
+from setuptools import setup
+from Cython.Build import cythonize
+
+# packages=[] skips package discovery, which would trip over the bot directories
+setup(packages=[], ext_modules=cythonize('roundstate.pyx', language_level=3))